@@ -0,0 +1,44 @@
+import pandas as pd
+import plotly.graph_objects as go
+
+# Box Plot 그룹별 최대 이상치 표시 개수
+BOX_OUTLIER_SAMPLE = 100
+
+# 그룹별 Box Plot 통계 (사분위수, 수염, 이상치 표본)
+# plotly와 같은 방식: 수염은 [q1 - 1.5 IQR, q3 + 1.5 IQR] 안의 최소/최대값, 그 밖의 값은 이상치
+# 값이 있는 행이 없으면 (선택한 연도에 데이터가 없거나 모두 결측값) 빈 통계/이상치 반환
+def box_summary(df, x, y, max_outliers=BOX_OUTLIER_SAMPLE):
+    data = df[[x, y]].dropna()
+    if data.empty:
+        summary = pd.DataFrame(columns=[x, 'q1', 'median', 'q3', 'lowerfence', 'upperfence'])
+        return summary, data
+    quartiles = data.groupby(x)[y].quantile([0.25, 0.5, 0.75]).unstack()
+    quartiles.columns = ['q1', 'median', 'q3']
+    iqr = quartiles['q3'] - quartiles['q1']
+
+    lower = data[x].map(quartiles['q1'] - 1.5 * iqr)
+    upper = data[x].map(quartiles['q3'] + 1.5 * iqr)
+    inside = (data[y] >= lower) & (data[y] <= upper)
+    fences = data[inside].groupby(x)[y].agg(['min', 'max'])
+    summary = quartiles.assign(lowerfence=fences['min'], upperfence=fences['max']).reset_index()
+
+    # 이상치는 그룹별로 최대 max_outliers개만 (고정 시드로 무작위 추출)
+    outliers = data[~inside].sample(frac=1, random_state=0).groupby(x).head(max_outliers)
+    return summary, outliers
+
+# 미리 계산한 통계로 Box Plot 생성 (응답 크기가 행 수가 아닌 그룹 수에 비례)
+def create_box_figure(df, x, y, color):
+    summary, outliers = box_summary(df, x, y)
+    fig = go.Figure(layout=dict(template='plotly_white'))
+    if summary.empty:
+        return fig
+    fig.add_trace(go.Box(
+        x=summary[x], q1=summary['q1'], median=summary['median'], q3=summary['q3'],
+        lowerfence=summary['lowerfence'], upperfence=summary['upperfence'],
+        marker_color=color, name=y
+    ))
+    fig.add_trace(go.Scatter(
+        x=outliers[x], y=outliers[y], mode='markers',
+        marker=dict(color=color, size=6, opacity=0.6), name='이상치'
+    ))
+    return fig
@@ -1,50 +1,391 @@
 import pandas as pd
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+import functools
+import hashlib
+import json
+import os
+import threading
 import time
+from file_utils import atomic_write
+
+# pyarrow가 없으면 스냅샷 캐시 없이 CSV를 직접 읽음
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
 
 
 file_path = "C:/keo/salesup/demo/final_schedule_data_with_metrics2.csv" 
 
+# 전처리 후 컬럼별 데이터 타입 정의
+# ID/카테고리/상태 컬럼은 범주형(딕셔너리 인코딩), 정수 컬럼은 값 범위에 맞는 작은 정수형 사용
+SCHEMA = {
+    '기록_ID': 'int32',
+    '매장_ID': 'category',
+    '매장_카테고리': 'category',
+    '일일_매장_판매량': 'int32',
+    '직원_ID': 'category',
+    '근무_여부': 'category',
+    '성별': 'category',
+    '연령': 'int8',
+    '상태': 'category',
+    '근무_시작': 'category',
+    '근무_종료': 'category',
+    '파견횟수': 'int16',
+    '판매_비율(%)': 'float32',
+    '매출_비율(%)': 'float32',
+    '연도': 'int16',
+    '월': 'int8',
+    '근무상태': 'category',
+    '파견횟수_그룹': 'int16',
+    '근무_시작_분': 'int16',
+    '근무_종료_분': 'int16',
+    '근무_시간': 'float32',
+}
+
+# 전처리 결과 형식이 바뀌면 값을 올려 기존 스냅샷을 무효화
+SNAPSHOT_VERSION = 2
+SNAPSHOT_METADATA_KEY = b'ntoday_snapshot'
+
+# "HH:MM" 문자열을 자정 기준 분(minute-of-day)으로 변환 (값이 없으면 -1)
+def parse_minute_of_day(series):
+    times = pd.to_datetime(series, format='%H:%M', errors='coerce')
+    return (times.dt.hour * 60 + times.dt.minute).fillna(-1)
+
+# "12.5%" 형식의 비율 문자열을 실수로 변환
+def parse_percent(series):
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    return pd.to_numeric(series.astype(str).str.rstrip('%'), errors='coerce')
+
+# 스키마에 정의된 데이터 타입 적용
+def apply_schema(df, schema=SCHEMA):
+    for column, dtype in schema.items():
+        if column in df.columns:
+            df[column] = df[column].astype(dtype)
+    return df
+
 # 데이터 전처리 함수
 def preprocess_data(df):
     df['기록_날짜'] = pd.to_datetime(df['기록_날짜'])
+    df['계약_시작일'] = pd.to_datetime(df['계약_시작일'], errors='coerce')
+    df['계약_종료일'] = pd.to_datetime(df['계약_종료일'], errors='coerce')
     # 추가 전처리 작업 수행
     df['연도'] = df['기록_날짜'].dt.year
     df['월'] = df['기록_날짜'].dt.month
+
+    # 근무 상태 컬럼 추가
+    df['근무상태'] = df['근무_여부'].where(df['근무_여부'].isin(['근무', '휴식중', '대기중']), 'NONE')
+
+    # 피드백 점수 그룹화
+    df['피드백_점수_그룹'] = pd.cut(
+        df['피드백_점수'],
+        bins=[-1.0, -0.6, -0.2, 0.2, 0.6, 1.0],
+        labels=['강하게 부정적', '부정적', '중립적', '긍정적', '강하게 긍정적'],
+        right=False,
+        include_lowest=True
+    )
+
+    # 파견 횟수를 그룹화
+    df['파견횟수_그룹'] = (df['파견횟수'] // 5) * 5
+
+    # 근무 시작/종료 시각을 분 단위 정수로 변환 (근무가 없는 행은 -1)
+    df['근무_시작_분'] = parse_minute_of_day(df['근무_시작'])
+    df['근무_종료_분'] = parse_minute_of_day(df['근무_종료'])
+
+    # 근무 시간 계산 (자정을 넘기는 근무는 24시간 기준으로 보정)
+    has_shift = (df['근무_시작_분'] >= 0) & (df['근무_종료_분'] >= 0)
+    df['근무_시간'] = ((df['근무_종료_분'] - df['근무_시작_분']) % 1440 / 60).where(has_shift, 0)
+    df['주'] = df['기록_날짜'].dt.to_period('W')
+
+    # 판매/매출 비율을 실수로 변환
+    df['판매_비율(%)'] = parse_percent(df['판매_비율(%)'])
+    df['매출_비율(%)'] = parse_percent(df['매출_비율(%)'])
     # 필요에 따라 다른 전처리 추가
 
-    return df
+    # 데이터 타입 적용 (파생 컬럼 생성 후 마지막에 수행)
+    return apply_schema(df)
+
+# 원본 파일 내용 해시 (스냅샷 키 및 데이터 버전 식별에 사용)
+def file_hash(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# 스냅샷 파일 경로 (원본 CSV 옆에 Arrow IPC 형식으로 저장)
+def snapshot_path(file_path):
+    return file_path + '.arrow'
+
+# 스냅샷이 원본 파일과 일치하면 메모리 맵으로 읽어서 반환, 아니면 None
+def read_snapshot(file_path, stat):
+    path = snapshot_path(file_path)
+    if pa is None or not os.path.exists(path):
+        return None
+    try:
+        source = pa.memory_map(path, 'r')
+        reader = pa.ipc.open_file(source)
+        metadata = json.loads((reader.schema.metadata or {}).get(SNAPSHOT_METADATA_KEY, b'{}'))
+        if metadata.get('version') != SNAPSHOT_VERSION or metadata.get('size') != stat.st_size:
+            return None
+        # 수정 시간이 다르면 내용 해시로 다시 확인 (파일을 그대로 복사/터치한 경우)
+        if metadata.get('mtime_ns') != stat.st_mtime_ns and metadata.get('hash') != file_hash(file_path):
+            return None
+        data = reader.read_all().to_pandas(split_blocks=True)
+        data.attrs['source_hash'] = metadata['hash']
+        return data
+    except Exception as e:
+        print(f"Error reading snapshot: {e}")
+        return None
+
+# 전처리된 데이터를 스냅샷으로 저장 (압축 없이 저장하여 메모리 맵으로 바로 읽을 수 있게 함)
+def write_snapshot(file_path, stat, data):
+    if pa is None:
+        return
+    try:
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[SNAPSHOT_METADATA_KEY] = json.dumps({
+            'version': SNAPSHOT_VERSION,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'hash': data.attrs['source_hash'],
+        }).encode()
+        table = table.replace_schema_metadata(metadata)
+        with atomic_write(snapshot_path(file_path)) as tmp_path:
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+    except Exception as e:
+        print(f"Error writing snapshot: {e}")
 
 # 기본 데이터 로드 및 전처리 처리 함수
 def load_data(file_path=file_path):
     try:
+        stat = os.stat(file_path)
+        data = read_snapshot(file_path, stat)
+        if data is not None:
+            print("Data loaded from snapshot.")
+            return data
+
+        source_hash = file_hash(file_path)
         data = pd.read_csv(file_path)
         print("Data loaded successfully.")
         # 전처리 함수 호출
         data = preprocess_data(data)
+        data.attrs['source_hash'] = source_hash
+        write_snapshot(file_path, stat, data)
         return data
     except Exception as e:
         print(f"Error loading data: {e}")
         return None
 
+# 프로세스 내 공유 데이터 저장소
+# 데이터는 한 번만 로드하고, 각 페이지에는 읽기 전용 뷰와 세대(generation) 번호를 제공
+class DataStore:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._state = None  # (데이터프레임, 세대 번호)
+        self._listeners = []
+
+    def _current_state(self):
+        state = self._state
+        if state is None:
+            with self._lock:
+                if self._state is None:
+                    self._state = (load_data(self.file_path), 1)
+                state = self._state
+        return state
+
+    def snapshot(self):
+        # 데이터 뷰와 세대 번호를 함께 반환 (두 값이 항상 같은 세대를 가리킴)
+        data, generation = self._current_state()
+        if data is not None:
+            data = data.copy(deep=False)
+        return data, generation
+
+    def get(self):
+        return self.snapshot()[0]
+
+    @property
+    def generation(self):
+        return self._current_state()[1]
+
+    @property
+    def fingerprint(self):
+        # 원본 파일 내용 해시 (프로세스 간에 공유되는 캐시의 키로 사용)
+        data = self._current_state()[0]
+        return data.attrs.get('source_hash') if data is not None else None
+
+    def add_reload_listener(self, callback):
+        # 데이터 교체 후 callback(data, generation) 호출
+        self._listeners.append(callback)
+
+    def reload(self):
+        # 새 데이터는 잠금 밖에서 완전히 만든 뒤, 참조만 한 번에 교체
+        with self._reload_lock:
+            data = load_data(self.file_path)
+            if data is None:
+                print("Reload failed. Keeping the current data.")
+                return False
+            with self._lock:
+                generation = self._state[1] + 1 if self._state else 1
+                self._state = (data, generation)
+            print(f"Data reloaded (generation {generation}).")
+
+        for callback in list(self._listeners):
+            try:
+                callback(data.copy(deep=False), generation)
+            except Exception as e:
+                print(f"Error in reload listener: {e}")
+        return True
+
+data_store = DataStore(file_path)
+
+# 공유 데이터의 읽기 전용 뷰 반환
+def get_data():
+    return data_store.get()
+
+# 현재 데이터 세대 번호 반환 (페이지별 캐시 키로 사용)
+def get_generation():
+    return data_store.generation
+
+# 데이터 세대별 캐시 데코레이터
+# 데코레이트된 함수는 첫 번째 인자로 현재 데이터를 전달받고, 세대가 바뀌면 캐시가 비워짐
+def cache_by_generation(func):
+    cache = {}
+    cache_generation = [None]
+    lock = threading.Lock()
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        data, generation = data_store.snapshot()
+        with lock:
+            if cache_generation[0] != generation:
+                cache.clear()
+                cache_generation[0] = generation
+            if args in cache:
+                return cache[args]
+        result = func(data, *args)
+        with lock:
+            if cache_generation[0] == generation:
+                cache[args] = result
+        return result
+
+    return wrapper
+
+# 근무 중인 데이터만 추출 (세대별 캐시)
+@cache_by_generation
+def get_working_data(df):
+    return df[df['근무_여부'] == '근무']
+
+# 컬럼별 고유값 목록 (페이지 레이아웃의 선택 목록용, 세대별 캐시)
+# 페이지는 데이터프레임을 모듈 전역에 보관하지 않고, 레이아웃을 만들 때마다 현재 세대의 목록을 조회
+@cache_by_generation
+def get_unique_values(df, column):
+    return sorted(df[column].dropna().unique())
+
+# 파생 집계 테이블 레지스트리
+# 집계는 이름과 함께 한 번만 선언하고, 처음 조회할 때 계산하여 데이터 세대별로 보관
+# 데이터가 다시 로드되면 모든 집계를 비우고, 다음 조회 시 새 데이터로 다시 계산
+class AggregateRegistry:
+    def __init__(self, store):
+        self._store = store
+        self._builders = {}
+        self._cache = {}
+        self._generation = None
+        self._lock = threading.Lock()
+        store.add_reload_listener(lambda data, generation: self.invalidate())
+
+    def register(self, name):
+        # 데코레이터: builder(df)는 현재 데이터를 받아 집계 결과를 반환
+        def decorator(builder):
+            self._builders[name] = builder
+            return builder
+        return decorator
+
+    def snapshot(self, name):
+        # (데이터 뷰, 집계 결과, 세대 번호)를 함께 반환 (집계가 항상 같은 세대의 데이터에서 만들어졌음을 보장)
+        data, generation = self._store.snapshot()
+        with self._lock:
+            if self._generation != generation:
+                self._cache.clear()
+                self._generation = generation
+            if name in self._cache:
+                return data, self._cache[name], generation
+        result = self._builders[name](data)
+        with self._lock:
+            if self._generation == generation:
+                self._cache[name] = result
+        return data, result, generation
+
+    def get(self, name):
+        return self.snapshot(name)[1]
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
+            self._generation = None
+
+aggregates = AggregateRegistry(data_store)
+
+# 집계 선언 데코레이터 / 집계 조회
+def aggregate(name):
+    return aggregates.register(name)
+
+def get_aggregate(name):
+    return aggregates.get(name)
+
+# 파일 변경 후 재로드까지 대기 시간 (초)
+# 에디터는 저장 한 번에 여러 개의 수정 이벤트를 발생시키므로, 이 시간 안의 이벤트는 한 번의 재로드로 합침
+RELOAD_DEBOUNCE_SECONDS = 1.0
+
 # 파일 변경 이벤트 핸들러
 class FileChangeHandler(FileSystemEventHandler):
-    def __init__(self, file_path, update_callback):
+    def __init__(self, file_path, update_callback, debounce_seconds=RELOAD_DEBOUNCE_SECONDS):
         super().__init__()
-        self.file_path = file_path
+        self.file_path = os.path.abspath(file_path)
         self.update_callback = update_callback
+        self.debounce_seconds = debounce_seconds
+        self._timer = None
+        self._timer_lock = threading.Lock()
+
+    def _is_target(self, path):
+        return os.path.abspath(path) == self.file_path
+
+    def _schedule_update(self):
+        # 마지막 이벤트 이후 debounce_seconds 동안 추가 이벤트가 없을 때 한 번만 실행
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce_seconds, self.update_callback, args=(self.file_path,))
+            self._timer.daemon = True
+            self._timer.start()
 
     def on_modified(self, event):
-        if event.src_path == self.file_path:
+        if self._is_target(event.src_path):
             print(f"File {event.src_path} has been modified.")
-            self.update_callback(self.file_path)
+            self._schedule_update()
+
+    def on_created(self, event):
+        if self._is_target(event.src_path):
+            self._schedule_update()
+
+    def on_moved(self, event):
+        # 임시 파일을 저장 후 이름을 바꾸는 방식의 에디터 대응
+        if self._is_target(event.dest_path):
+            self._schedule_update()
 
 # 자동 업데이트 기능을 위한 메인 함수
 def watch_file(file_path=file_path):
-    event_handler = FileChangeHandler(file_path, load_data)
+    event_handler = FileChangeHandler(file_path, lambda _: data_store.reload())
     observer = Observer()
-    observer.schedule(event_handler, path=file_path, recursive=False)
+    # 파일을 교체하는 방식으로 저장하는 경우에도 감지하도록 상위 디렉토리를 감시
+    observer.schedule(event_handler, path=os.path.dirname(os.path.abspath(file_path)), recursive=False)
     observer.start()
     print(f"Started watching {file_path}")
 
@@ -57,4 +398,4 @@ def watch_file(file_path=file_path):
 
 if __name__ == "__main__":
     data = load_data()  # 전역 경로 사용
-    watch_file()  # 전역 경로 사용
\ No newline at end of file
+    watch_file()  # 전역 경로 사용
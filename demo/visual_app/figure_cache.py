@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+import plotly.io as pio
+
+# diskcache가 없으면 프로세스 내 LRU 캐시만 사용
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+
+# 캐시 디렉토리 (같은 서버의 gunicorn 워커들이 공유)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache-directory')
+CACHE_SIZE_LIMIT = 256 * 1024 * 1024  # 디스크 캐시 최대 크기 (바이트)
+CACHE_MAX_ENTRIES = 128               # 프로세스 내 캐시 최대 항목 수
+CACHE_TIMEOUT = 60 * 60               # 캐시 만료 시간 (초 단위)
+
+# 캐시 키 정규화 (set/frozenset은 정렬하여 프로세스와 무관하게 같은 키가 되도록 함)
+def make_key(*parts):
+    def normalize(value):
+        if isinstance(value, (set, frozenset)):
+            return sorted(normalize(v) for v in value)
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        if hasattr(value, 'item'):  # numpy 스칼라
+            return value.item()
+        return value
+    return json.dumps([normalize(part) for part in parts], ensure_ascii=False, default=str)
+
+# 직렬화된 Figure JSON을 저장하는 LRU 캐시
+class FigureCache:
+    def __init__(self, name, max_entries=CACHE_MAX_ENTRIES, size_limit=CACHE_SIZE_LIMIT, timeout=CACHE_TIMEOUT):
+        self.name = name
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        if diskcache is not None:
+            try:
+                self._disk = diskcache.Cache(
+                    os.path.join(CACHE_DIR, name),
+                    size_limit=size_limit,
+                    eviction_policy='least-recently-used'
+                )
+            except Exception as e:
+                print(f"Error opening figure cache {name}: {e}")
+
+    def _get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        if self._disk is not None:
+            value = self._disk.get(key)
+            if value is not None:
+                self._remember(key, value)
+            return value
+        return None
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _set(self, key, value):
+        self._remember(key, value)
+        if self._disk is not None:
+            self._disk.set(key, value, expire=self.timeout)
+
+    def get_or_create(self, key, build):
+        # build()는 Figure 하나 또는 Figure 리스트를 반환
+        # 반환값은 Dash Output에 바로 사용할 수 있는 Figure 딕셔너리 (리스트)
+        value = self._get(key)
+        if value is None:
+            figures = build()
+            if isinstance(figures, (list, tuple)):
+                value = '[' + ','.join(pio.to_json(fig, validate=False) for fig in figures) + ']'
+            else:
+                value = pio.to_json(figures, validate=False)
+            self._set(key, value)
+        return json.loads(value)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
@@ -0,0 +1,17 @@
+import contextlib
+import os
+import threading
+
+# 임시 파일에 쓴 뒤 한 번에 교체하여, 다른 프로세스/스레드가 쓰다 만 파일을 읽지 않게 함
+# 사용법: with atomic_write(path) as tmp_path: (tmp_path에 저장)
+# 블록이 정상 종료되면 path로 교체하고, 예외가 발생하면 임시 파일을 지운 뒤 예외를 그대로 전달
+@contextlib.contextmanager
+def atomic_write(path):
+    tmp_path = f'{path}.{os.getpid()}-{threading.get_ident()}.tmp'
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,435 @@
+import argparse
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from file_utils import atomic_write
+
+# pyarrow가 없으면 예측 테이블을 CSV로 저장
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# fcntl이 없으면 (Windows) 잠금 없이 현재 프로세스가 미리 학습
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+FORECAST_PERIODS = 180  # 미래 예측 기간 (일)
+FORECAST_COLUMNS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper', 'trend', 'yearly', 'weekly']
+# 예측 테이블/모델/증분 갱신 상태 저장 경로 (그래프 캐시와 별도로 유지)
+FORECAST_CACHE_DIR = os.environ.get(
+    'FORECAST_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'forecast-cache')
+)
+# 모델 학습에 사용할 프로세스 수
+FORECAST_WORKERS = int(os.environ.get('FORECAST_WORKERS', min(4, os.cpu_count() or 1)))
+# 증분 갱신 시 재학습 기준: 이전 학습 시계열 대비 변화율(절대 변화량 합 / 이전 합계)이 이 값 미만이면 재학습 생략
+FORECAST_REFIT_TOLERANCE = float(os.environ.get('FORECAST_REFIT_TOLERANCE', 0.01))
+
+# 예측 단위별 시계열 구분 컬럼
+SERIES_LEVELS = {
+    'category': '매장_카테고리',
+    'store': '매장_ID',
+}
+
+# 카테고리별 일 단위 매출액 집계 (Prophet 입력 형식 ds/y)
+def daily_sales_series(df_working, category=None):
+    if category:
+        df_working = df_working[df_working['매장_카테고리'] == category]
+    daily_sales = df_working.groupby('기록_날짜')['매출액'].sum().reset_index()
+    daily_sales.columns = ['ds', 'y']
+    return daily_sales
+
+# 예측 단위(카테고리/매장)별 일 단위 매출액 시계열을 한 번의 groupby로 생성
+def build_series(df_working, level='category'):
+    column = SERIES_LEVELS[level]
+    daily = df_working.groupby([column, '기록_날짜'], observed=True)['매출액'].sum()
+    series = {}
+    for series_id, group in daily.groupby(level=0, observed=True):
+        daily_sales = group.droplevel(0).reset_index()
+        daily_sales.columns = ['ds', 'y']
+        series[series_id] = daily_sales
+    return series
+
+# 이전 모델의 파라미터를 다음 학습의 초기값으로 사용 (Prophet warm start)
+def warm_start_params(model):
+    params = {}
+    for name in ['k', 'm', 'sigma_obs']:
+        params[name] = model.params[name][0][0]
+    for name in ['delta', 'beta']:
+        params[name] = model.params[name][0]
+    return params
+
+# Prophet 모델 학습 및 예측 (프로세스 풀에서 실행되므로 모듈 최상위 함수로 정의)
+# init_model이 있으면 이전 모델(직렬화된 JSON)의 파라미터에서 학습을 시작
+def fit_forecast(daily_sales, periods=FORECAST_PERIODS, init_model=None):
+    from prophet import Prophet
+    from prophet.serialize import model_from_json, model_to_json
+
+    model = Prophet()
+    if init_model is not None:
+        try:
+            model.fit(daily_sales, init=warm_start_params(model_from_json(init_model)))
+        except Exception:
+            # 주기성 구성이 달라 파라미터 크기가 맞지 않으면 처음부터 학습
+            model = Prophet()
+            model.fit(daily_sales)
+    else:
+        model.fit(daily_sales)
+    future = model.make_future_dataframe(periods=periods)
+    forecast = model.predict(future)
+    # 주기성 항목이 없는 경우(데이터 기간이 짧은 경우) 0으로 채움
+    forecast = forecast.reindex(columns=FORECAST_COLUMNS, fill_value=0.0)
+    return forecast, model_to_json(model)
+
+# 예측 테이블 파일 경로 (데이터 해시와 예측 단위로 구분)
+def forecast_table_path(data_hash, level):
+    extension = 'parquet' if pyarrow is not None else 'csv'
+    return os.path.join(FORECAST_CACHE_DIR, f'{data_hash[:16]}-{level}.{extension}')
+
+def forecast_models_path(data_hash, level):
+    return os.path.join(FORECAST_CACHE_DIR, f'{data_hash[:16]}-{level}-models.pkl')
+
+# 시계열별 예측 결과를 하나의 long-format 테이블로 저장
+# (series_id, ds, yhat, yhat_lower, yhat_upper, trend, yearly, weekly)
+def write_forecast_table(data_hash, level, forecasts, models):
+    os.makedirs(FORECAST_CACHE_DIR, exist_ok=True)
+    table = pd.concat(
+        [forecast.assign(series_id=str(series_id)) for series_id, forecast in forecasts.items()],
+        ignore_index=True
+    )[['series_id'] + FORECAST_COLUMNS]
+
+    with atomic_write(forecast_table_path(data_hash, level)) as tmp_path:
+        if pyarrow is not None:
+            table.to_parquet(tmp_path, index=False)
+        else:
+            table.to_csv(tmp_path, index=False)
+
+    with atomic_write(forecast_models_path(data_hash, level)) as tmp_path:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({str(series_id): model for series_id, model in models.items()}, f)
+    return table
+
+# 저장된 예측 테이블을 시계열별 forecast로 나누어 반환 (없으면 None)
+def read_forecast_table(data_hash, level):
+    path = forecast_table_path(data_hash, level)
+    if not os.path.exists(path):
+        return None
+    try:
+        if path.endswith('.parquet'):
+            table = pd.read_parquet(path)
+        else:
+            table = pd.read_csv(path, parse_dates=['ds'])
+    except Exception as e:
+        print(f"Error reading forecast table: {e}")
+        return None
+    return {
+        series_id: group[FORECAST_COLUMNS].reset_index(drop=True)
+        for series_id, group in table.groupby('series_id', sort=False)
+    }
+
+# 증분 갱신 상태 파일 경로
+# 시계열별로 마지막 학습에 사용한 시계열, 모델, 예측 결과를 저장 (데이터 해시와 무관하게 유지)
+def forecast_state_path(level):
+    return os.path.join(FORECAST_CACHE_DIR, f'{level}-state.pkl')
+
+def read_forecast_state(level):
+    path = forecast_state_path(level)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"Error reading forecast state: {e}")
+        return {}
+
+def write_forecast_state(level, state):
+    os.makedirs(FORECAST_CACHE_DIR, exist_ok=True)
+    with atomic_write(forecast_state_path(level)) as tmp_path:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f)
+
+# 이전 학습 시계열 대비 변화율 (새로 추가된 날짜는 이전 값을 0으로 보고 계산)
+def series_change(previous, current):
+    old, new = previous.set_index('ds')['y'].align(current.set_index('ds')['y'], fill_value=0)
+    scale = old.abs().sum()
+    if scale == 0:
+        return float('inf') if new.abs().sum() else 0.0
+    return (new - old).abs().sum() / scale
+
+# 증분 갱신 계획: 변화가 허용 범위 안인 시계열은 이전 예측을 재사용하고, 나머지는 이전 모델에서 재학습
+# 반환값: (재사용할 예측 {ID: forecast}, 재학습할 시계열 {ID: 초기 모델 또는 None})
+def plan_refresh(series, state, tolerance=FORECAST_REFIT_TOLERANCE):
+    reuse, refit = {}, {}
+    for series_id, daily_sales in series.items():
+        previous = state.get(series_id)
+        if previous is not None and series_change(previous['series'], daily_sales) < tolerance:
+            reuse[series_id] = previous['forecast']
+        else:
+            refit[series_id] = previous['model'] if previous is not None else None
+    return reuse, refit
+
+# 배치 예측: 모든 시계열을 여러 프로세스에서 병렬로 학습하고 예측 테이블 저장
+# incremental=True이면 변경된 시계열만 이전 모델에서 warm start로 재학습
+def run_batch(df_working, level='category', workers=FORECAST_WORKERS, periods=FORECAST_PERIODS,
+              incremental=False, tolerance=FORECAST_REFIT_TOLERANCE):
+    data_hash = df_working.attrs.get('source_hash') or ''
+    series = build_series(df_working, level)
+    state = read_forecast_state(level) if incremental else {}
+    if incremental:
+        forecasts, refit = plan_refresh(series, state, tolerance)
+    else:
+        forecasts, refit = {}, {series_id: None for series_id in series}
+    models = {series_id: state[series_id]['model'] for series_id in forecasts}
+    reused = len(forecasts)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(fit_forecast, series[series_id], periods, init_model): series_id
+            for series_id, init_model in refit.items()
+        }
+        for future in as_completed(futures):
+            series_id = futures[future]
+            try:
+                forecasts[series_id], models[series_id] = future.result()
+            except Exception as e:
+                print(f"Error fitting forecast for {series_id}: {e}")
+                continue
+            state[series_id] = {'series': series[series_id], 'model': models[series_id], 'forecast': forecasts[series_id]}
+    elapsed = time.perf_counter() - start
+
+    table = write_forecast_table(data_hash, level, forecasts, models) if forecasts else None
+    write_forecast_state(level, state)
+    fitted = len(forecasts) - reused
+    throughput = fitted / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"Fitted {fitted}/{len(refit)} {level} series (reused {reused}) with {workers} workers "
+          f"in {elapsed:.1f}s ({throughput:.1f} series/min)")
+    return table
+
+# 예측 서비스: 모델을 백그라운드 프로세스에서 학습하고, 결과를 메모리와 예측 테이블에 캐시
+# 콜백에서는 캐시된 forecast만 읽고, 캐시가 없으면 학습 작업을 예약한 뒤 (None, 상태) 반환
+# 증분 모드에서는 데이터가 바뀌어도 변경된 시계열만 이전 모델에서 재학습
+class ForecastService:
+    def __init__(self, max_workers=FORECAST_WORKERS, level='category', incremental=True,
+                 tolerance=FORECAST_REFIT_TOLERANCE):
+        self.max_workers = max_workers
+        self.level = level
+        self.incremental = incremental
+        self.tolerance = tolerance
+        self._executor = None
+        self._lock = threading.Lock()
+        self._forecasts = {}  # (데이터 해시, 시계열 ID) -> forecast
+        self._models = {}     # (데이터 해시, 시계열 ID) -> 직렬화된 모델
+        self._pending = {}    # (데이터 해시, 시계열 ID) -> Future
+        self._failed = set()  # 학습에 실패한 (데이터 해시, 시계열 ID)
+        self._batches = {}    # 데이터 해시 -> 미리 학습 중인 시계열 ID 목록
+        self._loaded_tables = set()
+        self._inputs = {}     # (데이터 해시, 시계열 ID) -> 학습에 사용한 시계열
+        self._state = None    # 시계열 ID -> 마지막 학습 상태 (증분 갱신용)
+        self._stale = set()   # 현재 데이터 기준으로 재학습이 필요한 시계열 ID
+
+    def _get_state(self):
+        if self._state is None:
+            self._state = read_forecast_state(self.level) if self.incremental else {}
+        return self._state
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _load_table(self, data_hash):
+        # 데이터 해시별로 한 번만 디스크의 예측 테이블을 읽음
+        # 테이블이 아직 없으면 (다른 프로세스가 미리 학습 중) 다음 조회 때 다시 확인
+        with self._lock:
+            if data_hash in self._loaded_tables:
+                return
+        forecasts = read_forecast_table(data_hash, self.level)
+        if forecasts:
+            with self._lock:
+                self._loaded_tables.add(data_hash)
+                for series_id, forecast in forecasts.items():
+                    self._forecasts[(data_hash, series_id)] = forecast
+
+    def _on_done(self, key, future):
+        try:
+            forecast, model_json = future.result()
+        except Exception as e:
+            print(f"Error fitting forecast for {key[1]}: {e}")
+            with self._lock:
+                self._pending.pop(key, None)
+                self._inputs.pop(key, None)
+                self._failed.add(key)
+            self._finish_batch(key)
+            return
+        with self._lock:
+            self._forecasts[key] = forecast
+            self._models[key] = model_json
+            self._pending.pop(key, None)
+            daily_sales = self._inputs.pop(key, None)
+            self._stale.discard(key[1])
+            if self.incremental and daily_sales is not None:
+                self._get_state()[key[1]] = {'series': daily_sales, 'model': model_json, 'forecast': forecast}
+        self._finish_batch(key)
+
+    def _finish_batch(self, key):
+        # 미리 학습하던 시계열이 모두 끝나면 예측 테이블로 저장
+        data_hash, series_id = key
+        with self._lock:
+            batch = self._batches.get(data_hash)
+            if batch is None or series_id not in batch['remaining']:
+                return
+            batch['remaining'].discard(series_id)
+            if batch['remaining']:
+                return
+            del self._batches[data_hash]
+            forecasts = {
+                sid: self._forecasts[(data_hash, sid)]
+                for sid in batch['series'] if (data_hash, sid) in self._forecasts
+            }
+            state = self._get_state()
+            models = {
+                sid: self._models.pop((data_hash, sid), None) or state.get(sid, {}).get('model')
+                for sid in forecasts
+            }
+            state = dict(state)
+        self._write_results(data_hash, forecasts, models, state)
+
+    def _write_results(self, data_hash, forecasts, models, state):
+        if not forecasts:
+            return
+        try:
+            write_forecast_table(data_hash, self.level, forecasts, models)
+            if self.incremental:
+                write_forecast_state(self.level, state)
+        except Exception as e:
+            print(f"Error writing forecast table: {e}")
+
+    def _submit(self, key, daily_sales, init_model=None):
+        # 이미 학습 중이면 중복 예약하지 않음
+        with self._lock:
+            if key in self._forecasts or key in self._pending or key in self._failed:
+                return False
+            future = self._get_executor().submit(fit_forecast, daily_sales, FORECAST_PERIODS, init_model)
+            self._pending[key] = future
+            self._inputs[key] = daily_sales
+        future.add_done_callback(lambda f: self._on_done(key, f))
+        return True
+
+    def _status(self, key):
+        # (forecast, 상태)를 잠금 안에서 한 번에 읽음: 'ready', 'pending', 'failed'
+        # 학습 완료 시 forecast 저장과 pending 제거가 같은 잠금 안에서 일어나므로 중간 상태를 보지 않음
+        with self._lock:
+            forecast = self._forecasts.get(key)
+            if forecast is not None:
+                return forecast, 'ready'
+            return None, 'pending' if key in self._pending else 'failed'
+
+    def get_forecast(self, df_working, category):
+        data_hash = df_working.attrs.get('source_hash') or ''
+        key = (data_hash, category)
+        self._load_table(data_hash)
+        forecast, status = self._status(key)
+        if forecast is not None:
+            return forecast, status
+
+        daily_sales = daily_sales_series(df_working, category)
+        if not daily_sales.empty:
+            with self._lock:
+                init_model = self._get_state().get(category, {}).get('model')
+            self._submit(key, daily_sales, init_model)
+        return self._status(key)
+
+    def stale_series(self):
+        # 현재 데이터 기준으로 아직 재학습이 끝나지 않은 시계열 ID
+        with self._lock:
+            return sorted(self._stale)
+
+    def prefit(self, df_working):
+        # 데이터가 바뀌었으면 이전 데이터의 예측 결과는 메모리에서 제거
+        data_hash = df_working.attrs.get('source_hash') or ''
+        with self._lock:
+            for key in [key for key in self._forecasts if key[0] != data_hash]:
+                del self._forecasts[key]
+            self._failed = {key for key in self._failed if key[0] == data_hash}
+        self._load_table(data_hash)
+
+        # 예측 테이블에 없는 시계열만 학습하고, 모두 끝나면 테이블을 다시 저장
+        series = build_series(df_working, self.level)
+        with self._lock:
+            missing = {sid: series[sid] for sid in series if (data_hash, sid) not in self._forecasts}
+            if self.incremental:
+                reuse, refit = plan_refresh(missing, self._get_state(), self.tolerance)
+            else:
+                reuse, refit = {}, {sid: None for sid in missing}
+            for series_id, forecast in reuse.items():
+                self._forecasts[(data_hash, series_id)] = forecast
+            self._stale = set(refit)
+            if refit and data_hash not in self._batches:
+                self._batches[data_hash] = {'series': set(series), 'remaining': set(refit)}
+        if reuse:
+            print(f"Reusing {len(reuse)} unchanged forecasts, refitting {len(refit)}.")
+        if reuse and not refit:
+            # 재학습할 시계열이 없으면 재사용한 예측으로 바로 테이블 저장
+            with self._lock:
+                forecasts = {sid: self._forecasts[(data_hash, sid)] for sid in series if (data_hash, sid) in self._forecasts}
+                state = dict(self._get_state())
+            self._write_results(data_hash, forecasts, {sid: state.get(sid, {}).get('model') for sid in forecasts}, state)
+        for series_id, init_model in refit.items():
+            if not self._submit((data_hash, series_id), series[series_id], init_model):
+                self._finish_batch((data_hash, series_id))
+
+forecast_service = ForecastService()
+
+# 워커 프로세스(spawn 방식)에서 모듈을 다시 불러올 때는 학습 작업을 예약하지 않도록 확인
+def is_main_process():
+    return multiprocessing.current_process().name == 'MainProcess'
+
+# 미리 학습 담당 프로세스 잠금 (잠금 파일, 프로세스가 끝나면 운영체제가 해제)
+# 웹 서버 워커가 여러 개여도 잠금을 얻은 한 프로세스만 모든 시계열을 미리 학습하고,
+# 나머지 워커는 저장된 예측 테이블을 읽거나 요청된 시계열만 학습
+_prefit_lock = None  # (잠금을 얻은 프로세스 ID, 잠금 파일)
+
+def acquire_prefit_lock():
+    global _prefit_lock
+    if _prefit_lock is not None:
+        # fork로 만들어진 워커는 부모의 잠금 파일을 물려받지만 담당 프로세스가 아님
+        return _prefit_lock[0] == os.getpid()
+    if fcntl is None:
+        return True
+    os.makedirs(FORECAST_CACHE_DIR, exist_ok=True)
+    lock_file = open(os.path.join(FORECAST_CACHE_DIR, 'prefit.lock'), 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _prefit_lock = (os.getpid(), lock_file)
+    return True
+
+# 야간 배치 실행용 진입점
+# 예) python forecast_service.py --level store --workers 8
+if __name__ == "__main__":
+    from data_processing import load_data, file_path
+
+    parser = argparse.ArgumentParser(description="카테고리/매장별 매출액 예측 배치")
+    parser.add_argument('--file', default=file_path, help="스케줄 데이터 CSV 경로")
+    parser.add_argument('--level', choices=sorted(SERIES_LEVELS), default='category', help="예측 단위")
+    parser.add_argument('--workers', type=int, default=FORECAST_WORKERS, help="학습 프로세스 수")
+    parser.add_argument('--periods', type=int, default=FORECAST_PERIODS, help="미래 예측 기간 (일)")
+    parser.add_argument('--incremental', action='store_true', help="변경된 시계열만 이전 모델에서 재학습")
+    parser.add_argument('--tolerance', type=float, default=FORECAST_REFIT_TOLERANCE, help="재학습 기준 변화율")
+    args = parser.parse_args()
+
+    data = load_data(args.file)
+    if data is not None:
+        run_batch(data[data['근무_여부'] == '근무'], args.level, args.workers, args.periods,
+                  args.incremental, args.tolerance)
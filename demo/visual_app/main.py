@@ -2,9 +2,15 @@
 import dash
 from dash import dcc, html
 import dash_bootstrap_components as dbc
-from data_processing import load_data, watch_file
+import pandas as pd
+from data_processing import get_data, watch_file
 import threading
 
+# 공유 데이터를 읽기 전용 뷰로 나누어 주기 위해 Copy-on-Write 모드 사용
+# (페이지에서 컬럼을 추가/수정해도 원본 데이터는 복사되지 않고 그대로 유지됨)
+# 페이지 모듈을 불러오기 전, 앱 진입점에서 한 번만 설정
+pd.set_option('mode.copy_on_write', True)
+
 # Bootstrap 4.5.2 CDN URL
 BOOTSTRAP_CDN = "https://stackpath.bootstrapcdn.com/bootstrap/4.5.2/css/bootstrap.min.css"
 
@@ -20,7 +26,7 @@ server = app.server
 
 
 # 초기 데이터 로드
-data = load_data()  # 최초 데이터 로드 및 전처리
+data = get_data()  # 공유 데이터 저장소에서 최초 데이터 로드 및 전처리
 
 # 네비게이션 바 컴포넌트 생성
 def create_navbar():
@@ -0,0 +1,282 @@
+import argparse
+import functools
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from data_processing import cache_by_generation, file_path, load_data
+from figure_cache import CACHE_DIR
+from file_utils import atomic_write
+
+HOURS = 24
+# 직원 색상 팔레트 (파스텔 톤): 황금비 간격으로 색상(hue)을 배치해 인접한 직원 코드끼리 색이 겹치지 않게 함
+PALETTE_HUE_STEP = 0.618033988749895
+PALETTE_SATURATION = 0.55
+PALETTE_VALUE = 0.92
+# 커버리지 큐브 저장 위치 (데이터 해시별 .npy + 메타데이터 .json)
+COVERAGE_CACHE_DIR = os.path.join(CACHE_DIR, 'coverage')
+
+# 근무 시작/종료 시각(분)을 (근무 × 24시간) bool 행렬로 변환
+# 종료 시각이 시작 시각보다 이르면 다음 날까지 이어지는 야간 근무로 보고 24시간 모듈러로 처리
+# 시각이 없는 근무(-1)는 모든 시간대가 False
+def shift_hours(start_minutes, end_minutes):
+    start = np.asarray(start_minutes, dtype=np.int64) // 60
+    end = np.asarray(end_minutes, dtype=np.int64) // 60
+    valid = (start >= 0) & (end >= 0)
+    length = (end - start) % HOURS
+    offset = (np.arange(HOURS) - start[:, None]) % HOURS
+    return (offset < length[:, None]) & valid[:, None]
+
+# 직원별 시간대 근무 여부 (직원 × 24시간)
+# employee_codes는 0..n_employees-1 범위의 직원 번호 (한 직원의 여러 근무는 OR로 합침)
+def employee_occupancy(employee_codes, start_minutes, end_minutes, n_employees):
+    hours = shift_hours(start_minutes, end_minutes)
+    occupancy = np.zeros((n_employees, HOURS), dtype=bool)
+    np.logical_or.at(occupancy, np.asarray(employee_codes), hours)
+    return occupancy
+
+# 직원 코드(직원_ID 카테고리 코드) -> RGB uint8 고정 팔레트 (n_employees × 3)
+# 같은 코드는 항상 같은 색이므로 시간표 Figure를 캐시할 수 있음
+@functools.lru_cache(maxsize=None)
+def employee_palette(n_employees):
+    hue = (np.arange(n_employees) * PALETTE_HUE_STEP) % 1.0 * 6
+    sector = hue.astype(np.int64) % 6
+    fraction = hue - np.floor(hue)
+    v = np.full(n_employees, PALETTE_VALUE)
+    p = v * (1 - PALETTE_SATURATION)
+    q = v * (1 - PALETTE_SATURATION * fraction)
+    t = v * (1 - PALETTE_SATURATION * (1 - fraction))
+    # HSV -> RGB (색상환 6개 구간별 R, G, B 성분)
+    channels = np.stack([
+        np.choose(sector, [v, q, p, p, t, v]),
+        np.choose(sector, [t, v, v, q, p, p]),
+        np.choose(sector, [p, p, t, v, v, q]),
+    ], axis=1)
+    palette = np.round(channels * 255).astype(np.uint8)
+    palette.flags.writeable = False
+    return palette
+
+def to_hex(rgb):
+    return [f'#{r:02x}{g:02x}{b:02x}' for r, g, b in np.asarray(rgb).tolist()]
+
+# 시간대별 근무 인원 수와 혼합 색상 (근무 직원 색상의 평균, 소수점 버림)
+# 반환값: (인원 수 배열(24), 혼합 RGB 배열(24 × 3))
+def slot_colors(occupancy, rgb):
+    counts = occupancy.sum(axis=0)
+    sums = occupancy.T.astype(np.int64) @ np.asarray(rgb, dtype=np.int64)
+    mixed = sums // np.maximum(counts, 1)[:, None]
+    return counts, mixed.astype(np.uint8)
+
+# 시간대별 텍스트 레이블 ('9시 - 직원1, 직원2', 근무자가 없으면 빈 문자열)
+def slot_labels(occupancy, employee_ids):
+    employee_ids = np.asarray(employee_ids, dtype=object)
+    return [
+        f'{hour}시 - ' + ', '.join(employee_ids[occupancy[:, hour]]) if occupancy[:, hour].any() else ''
+        for hour in range(HOURS)
+    ]
+
+# 매장 × 날짜 × 시간 근무 인원 텐서 (같은 직원의 중복 근무는 한 명으로 계산)
+class CoverageTensor:
+    def __init__(self, stores, start_date, counts):
+        self.stores = list(stores)
+        self.start_date = start_date
+        self.counts = counts  # uint8 배열 (매장 수, 날짜 수, 24)
+        self._store_index = {store: i for i, store in enumerate(self.stores)}
+
+    @property
+    def dates(self):
+        return self.start_date + np.arange(self.counts.shape[1]).astype('timedelta64[D]')
+
+    def hours(self, store, date):
+        # 해당 매장/날짜의 시간대별 근무 인원 (범위 밖이면 0)
+        store_idx = self._store_index.get(store)
+        day = (np.datetime64(pd.Timestamp(date).date(), 'D') - self.start_date).astype(np.int64)
+        if store_idx is None or not 0 <= day < self.counts.shape[1]:
+            return np.zeros(HOURS, dtype=self.counts.dtype)
+        return self.counts[store_idx, day]
+
+    def period(self, store, start, end):
+        # 해당 매장의 [start, end) 기간 (날짜 배열, 날짜 × 24 인원 배열), 범위 밖 날짜는 제외
+        store_idx = self._store_index.get(store)
+        first = max((np.datetime64(start, 'D') - self.start_date).astype(np.int64), 0)
+        last = min((np.datetime64(end, 'D') - self.start_date).astype(np.int64), self.counts.shape[1])
+        if store_idx is None or first >= last:
+            return self.dates[:0], np.zeros((0, HOURS), dtype=self.counts.dtype)
+        return self.dates[first:last], self.counts[store_idx, first:last]
+
+def build_coverage(df_working):
+    stores = df_working['매장_ID'].astype('category')
+    store_codes = stores.cat.codes.to_numpy().astype(np.int64)
+    employee_codes = df_working['직원_ID'].astype('category').cat.codes.to_numpy().astype(np.int64)
+    dates = df_working['기록_날짜'].to_numpy(dtype='datetime64[D]')
+    if len(dates) == 0:
+        return CoverageTensor(stores.cat.categories, np.datetime64('today', 'D'), np.zeros((0, 0, HOURS), np.uint8))
+    start_date = dates.min()
+    days = (dates - start_date).astype(np.int64)
+    n_stores, n_days, n_employees = len(stores.cat.categories), days.max() + 1, employee_codes.max() + 1
+
+    # 근무한 (근무, 시간) 쌍을 (매장, 날짜, 직원, 시간) 키로 만든 뒤 중복 제거
+    hours = shift_hours(df_working['근무_시작_분'].to_numpy(), df_working['근무_종료_분'].to_numpy())
+    hours &= ((store_codes >= 0) & (employee_codes >= 0))[:, None]
+    rows, hour = np.nonzero(hours)
+    slot = (store_codes[rows] * n_days + days[rows]) * HOURS + hour
+    keys = np.unique(slot * n_employees + employee_codes[rows])
+    counts = np.bincount(keys // n_employees, minlength=n_stores * n_days * HOURS)
+    counts = np.minimum(counts, np.iinfo(np.uint8).max).astype(np.uint8)
+    return CoverageTensor(stores.cat.categories, start_date, counts.reshape(n_stores, n_days, HOURS))
+
+# 커버리지 큐브 파일 경로 (데이터 해시로 구분)
+def coverage_cube_path(data_hash):
+    return os.path.join(COVERAGE_CACHE_DIR, f'{data_hash[:16]}.npy')
+
+def coverage_meta_path(data_hash):
+    return os.path.join(COVERAGE_CACHE_DIR, f'{data_hash[:16]}.json')
+
+# 큐브는 uint8 .npy로, 매장 목록과 시작일은 JSON으로 저장 (메타데이터를 먼저 교체)
+def write_coverage(data_hash, coverage):
+    os.makedirs(COVERAGE_CACHE_DIR, exist_ok=True)
+    with atomic_write(coverage_meta_path(data_hash)) as tmp_path:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'stores': coverage.stores, 'start_date': str(coverage.start_date)}, f, ensure_ascii=False)
+
+    with atomic_write(coverage_cube_path(data_hash)) as tmp_path:
+        with open(tmp_path, 'wb') as f:
+            np.save(f, coverage.counts)
+
+# 저장된 큐브를 메모리 맵으로 열기 (없으면 None)
+# 페이지는 필요한 매장/기간만 읽으므로 큐브 전체를 메모리에 올리지 않음
+def read_coverage(data_hash):
+    cube_path = coverage_cube_path(data_hash)
+    meta_path = coverage_meta_path(data_hash)
+    if not (os.path.exists(cube_path) and os.path.exists(meta_path)):
+        return None
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        counts = np.load(cube_path, mmap_mode='r')
+    except Exception as e:
+        print(f"Error reading coverage cube: {e}")
+        return None
+    return CoverageTensor(meta['stores'], np.datetime64(meta['start_date'], 'D'), counts)
+
+# 현재 데이터의 커버리지 텐서 (세대별 캐시)
+# 같은 데이터로 만든 큐브 파일이 있으면 다시 계산하지 않고 메모리 맵으로 공유
+@cache_by_generation
+def get_coverage(df):
+    data_hash = df.attrs.get('source_hash')
+    if data_hash:
+        coverage = read_coverage(data_hash)
+        if coverage is not None:
+            return coverage
+    coverage = build_coverage(df[df['근무_여부'] == '근무'])
+    if data_hash:
+        try:
+            write_coverage(data_hash, coverage)
+            coverage = read_coverage(data_hash) or coverage
+        except Exception as e:
+            print(f"Error writing coverage cube: {e}")
+    return coverage
+
+
+# 기존 schedule_dashboard의 다중 색상 혼합 함수 (벤치마크 비교용)
+def mix_multiple_colors(colors):
+    rgb_values = [np.array([int(color[i:i+2], 16) for i in (1, 3, 5)]) for color in colors]
+    # 색상값 평균 사용
+    mixed_rgb = np.mean(rgb_values, axis=0).astype(int)
+    return f'#{mixed_rgb[0]:02x}{mixed_rgb[1]:02x}{mixed_rgb[2]:02x}'
+
+# 기존 update_schedule의 시간대 계산 방식 (벤치마크 비교용, 원래 코드 그대로)
+# 행마다 근무_시작/근무_종료 문자열을 나누어 시각을 구하고, 오전/오후 시간대 목록에 직원을 추가
+def legacy_time_slots(filtered_df, employee_color_map):
+    employee_ids = filtered_df['직원_ID'].unique()
+
+    # 시간대별 근무 직원 정보 저장
+    time_slots_am = [[] for _ in range(12)]
+    time_slots_pm = [[] for _ in range(12)]
+
+    for emp_id in employee_ids:
+        emp_data = filtered_df[filtered_df['직원_ID'] == emp_id]
+        for _, row in emp_data.iterrows():
+            start_hour = int(row['근무_시작'].split(':')[0])
+            end_hour = int(row['근무_종료'].split(':')[0])
+            for hour in range(start_hour, end_hour):
+                hour_mod = hour % 24
+                if hour_mod < 12:
+                    time_slots_am[hour_mod].append(emp_id)
+                else:
+                    time_slots_pm[hour_mod - 12].append(emp_id)
+
+    # 혼합 색상 및 텍스트 레이블 적용
+    slot_colors_am = ['white'] * 12
+    slot_colors_pm = ['white'] * 12
+    text_labels_am = [''] * 12
+    text_labels_pm = [''] * 12
+
+    for i in range(12):
+        # 오전 시간대 텍스트 설정
+        if len(time_slots_am[i]) == 1:
+            slot_colors_am[i] = employee_color_map[time_slots_am[i][0]]
+            text_labels_am[i] = f'{i}시 - ' + ', '.join(time_slots_am[i])
+        elif len(time_slots_am[i]) > 1:
+            mixed_color = mix_multiple_colors([employee_color_map[emp_id] for emp_id in time_slots_am[i]])
+            slot_colors_am[i] = mixed_color
+            text_labels_am[i] = f'{i}시 - ' + ', '.join(time_slots_am[i])
+
+        # 오후 시간대 텍스트 설정
+        if len(time_slots_pm[i]) == 1:
+            slot_colors_pm[i] = employee_color_map[time_slots_pm[i][0]]
+            text_labels_pm[i] = f'{i + 12}시 - ' + ', '.join(time_slots_pm[i])
+        elif len(time_slots_pm[i]) > 1:
+            mixed_color = mix_multiple_colors([employee_color_map[emp_id] for emp_id in time_slots_pm[i]])
+            slot_colors_pm[i] = mixed_color
+            text_labels_pm[i] = f'{i + 12}시 - ' + ', '.join(time_slots_pm[i])
+
+    return text_labels_am + text_labels_pm, slot_colors_am + slot_colors_pm
+
+def vectorized_time_slots(filtered_df):
+    categories = filtered_df['직원_ID'].cat.categories
+    codes, palette_codes = pd.factorize(filtered_df['직원_ID'].cat.codes)
+    occupancy = employee_occupancy(
+        codes, filtered_df['근무_시작_분'].to_numpy(), filtered_df['근무_종료_분'].to_numpy(), len(palette_codes)
+    )
+    counts, mixed = slot_colors(occupancy, employee_palette(len(categories))[palette_codes])
+    labels = slot_labels(occupancy, [str(e) for e in categories[palette_codes]])
+    return labels, [color if count else 'white' for color, count in zip(to_hex(mixed), counts)]
+
+# 매장/날짜별 시간표 계산 시간 비교
+def benchmark(df, samples=200):
+    df_working = df[df['근무_여부'] == '근무']
+    groups = list(df_working.groupby(['매장_ID', '기록_날짜'], observed=True).groups.values())[:samples]
+    frames = [df_working.loc[index] for index in groups]
+    categories = df['직원_ID'].cat.categories
+    color_map = dict(zip(categories, to_hex(employee_palette(len(categories)))))
+
+    start = time.perf_counter()
+    for frame in frames:
+        legacy_time_slots(frame, color_map)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for frame in frames:
+        vectorized_time_slots(frame)
+    vectorized = time.perf_counter() - start
+
+    start = time.perf_counter()
+    coverage = build_coverage(df_working)
+    tensor = time.perf_counter() - start
+
+    print(f"{len(frames)} store-days: legacy {legacy * 1000:.1f} ms, vectorized {vectorized * 1000:.1f} ms "
+          f"({legacy / vectorized:.1f}x)")
+    print(f"Coverage tensor {coverage.counts.shape} built in {tensor * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="시간대별 근무 인원 계산 벤치마크")
+    parser.add_argument('--file', default=file_path, help="근무 데이터 CSV 경로")
+    parser.add_argument('--samples', type=int, default=200, help="비교할 매장/날짜 수")
+    args = parser.parse_args()
+
+    data = load_data(args.file)
+    if data is not None:
+        benchmark(data, args.samples)
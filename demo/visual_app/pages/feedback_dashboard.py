@@ -1,57 +1,65 @@
+import time
 import dash
 from dash import dcc, html, Input, Output, State
 import dash_bootstrap_components as dbc
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from data_processing import load_data
+from data_processing import aggregate, get_aggregate, get_unique_values
+from box_plot import create_box_figure
+from scatter_render import density_trace, render_mode, report_render
 
 # 페이지 등록
 dash.register_page(__name__, path="/feedback_dashboard", name="Feedback Dashboard")
 
-# 데이터 전처리
-df = load_data()  # 전처리 함수 호출
-df['기록_날짜'] = pd.to_datetime(df['기록_날짜'])
+# 근무_시간, 주 컬럼은 data_processing.preprocess_data에서 생성됨
 
-# 근무 시간 계산
-df['근무_시작'] = pd.to_datetime(df['근무_시작'], format='%H:%M', errors='coerce')
-df['근무_종료'] = pd.to_datetime(df['근무_종료'], format='%H:%M', errors='coerce')
-df['근무_시간'] = (df['근무_종료'] - df['근무_시작']).dt.seconds / 3600
-df['근무_시간'] = df['근무_시간'].fillna(0)
-df['주'] = df['기록_날짜'].dt.to_period('W')
+# 데이터 준비 (처음 사용할 때 계산하고, 데이터가 다시 로드되면 새로 계산)
+@aggregate('feedback.weekly_stats')
+def build_weekly_stats(df):
+    return df.groupby(['주', '직원_ID'], observed=True).agg(
+        총_근무_시간=('근무_시간', 'sum'),
+        평균_피드백_점수=('피드백_점수', 'mean')
+    ).reset_index()
 
-# 데이터 준비
-weekly_stats = df.groupby(['주', '직원_ID']).agg(
-    총_근무_시간=('근무_시간', 'sum'),
-    평균_피드백_점수=('피드백_점수', 'mean')
-).reset_index()
-
-employment_feedback = df.groupby(['상태']).agg(
-    평균_피드백_점수=('피드백_점수', 'mean')
-).reset_index()
+@aggregate('feedback.employment_feedback')
+def build_employment_feedback(df):
+    return df.groupby(['상태'], observed=True).agg(
+        평균_피드백_점수=('피드백_점수', 'mean')
+    ).reset_index()
 
 # 카테고리별 직원의 매출액과 근무 일수 계산
-category_sales = df.groupby(['직원_ID', '매장_카테고리']).agg(
-    총_매출액=('매출액', 'sum'),
-    근무_일수=('기록_날짜', 'nunique')  # 직원이 해당 카테고리에서 근무한 일수 계산
-).reset_index()
-
-# 직원의 카테고리별 평균 매출액 계산
-category_sales['평균_매출액_근무당'] = category_sales['총_매출액'] / category_sales['근무_일수']
+@aggregate('feedback.category_sales')
+def build_category_sales(df):
+    category_sales = df.groupby(['직원_ID', '매장_카테고리'], observed=True).agg(
+        총_매출액=('매출액', 'sum'),
+        근무_일수=('기록_날짜', 'nunique')  # 직원이 해당 카테고리에서 근무한 일수 계산
+    ).reset_index()
 
-# 연도 선택 체크박스 추가
-unique_years = df['기록_날짜'].dt.year.unique()  # 데이터프레임에서 고유한 연도 추출
+    # 직원의 카테고리별 평균 매출액 계산
+    category_sales['평균_매출액_근무당'] = category_sales['총_매출액'] / category_sales['근무_일수']
+    return category_sales
 
 # '기록_날짜' 열을 그대로 유지하며 그룹화 후 연도를 추가하는 방식으로 수정
-salary_stats = df.groupby(['직원_ID', df['기록_날짜'].dt.to_period('Y')]).agg(
-    평균_급여=('직원_급여', 'mean')
-).reset_index()
-
-# '기록_날짜'를 datetime 형식으로 변환
-salary_stats['기록_날짜'] = salary_stats['기록_날짜'].apply(lambda x: x.start_time)  # to_period로부터 datetime 변환
-
-# 직원 ID 추출
-employee_options = salary_stats['직원_ID'].unique()
+@aggregate('feedback.salary_stats')
+def build_salary_stats(df):
+    salary_stats = df.groupby(['직원_ID', df['기록_날짜'].dt.to_period('Y')], observed=True).agg(
+        평균_급여=('직원_급여', 'mean')
+    ).reset_index()
+
+    # '기록_날짜'를 datetime 형식으로 변환
+    salary_stats['기록_날짜'] = salary_stats['기록_날짜'].apply(lambda x: x.start_time)  # to_period로부터 datetime 변환
+    return salary_stats
+
+# 급여/거리 그룹별 피드백 점수 (Box Plot용, 필요한 컬럼만 유지)
+@aggregate('feedback.feedback_groups')
+def build_feedback_groups(df):
+    return pd.DataFrame({
+        '연도': df['기록_날짜'].dt.year,
+        '급여_그룹': (df['직원_급여'] // 100) * 100,  # 100만 원 단위로 그룹화
+        '거리_그룹': (df['직원_매장_거리'] // 1) * 1,  # 1km 단위로 그룹화
+        '피드백_점수': df['피드백_점수'],
+    })
 
 # 색상 팔레트 정의
 PRIMARY_COLOR = "#007BFF"
@@ -102,39 +110,40 @@ def create_card(title, graph_id, additional_controls=None):
     )
 
 # 중앙 연도 선택 체크박스 컴포넌트 생성
-year_checkbox = dbc.Card(
-    dbc.CardBody(
-        [
-            html.Label(
-                "연도 선택",
-                style={
-                    'font-weight': 'bold',
-                    'font-size': '16px',
-                    'margin-bottom': '10px',
-                    'color': '#007BFF'
-                }
-            ),
-            dbc.Checklist(
-                options=[{'label': str(year), 'value': year} for year in sorted(unique_years)],
-                value=list(sorted(unique_years)),  # 기본적으로 모든 연도가 선택됨
-                id="year-checkbox",
-                inline=True,
-                switch=True,
-                style={
-                    'display': 'flex',
-                    'flex-wrap': 'wrap',
-                    'gap': '10px',
-                    'padding': '10px 0',
-                    'background-color': '#F0F2F5',
-                    'border-radius': '8px'
-                }
-            ),
-        ],
-        style={'padding': '20px'}
-    ),
-    style=CARD_STYLE,
-    className="mb-4"
-)
+def create_year_checkbox(years):
+    return dbc.Card(
+        dbc.CardBody(
+            [
+                html.Label(
+                    "연도 선택",
+                    style={
+                        'font-weight': 'bold',
+                        'font-size': '16px',
+                        'margin-bottom': '10px',
+                        'color': '#007BFF'
+                    }
+                ),
+                dbc.Checklist(
+                    options=[{'label': str(year), 'value': year} for year in years],
+                    value=years,  # 기본적으로 모든 연도가 선택됨
+                    id="year-checkbox",
+                    inline=True,
+                    switch=True,
+                    style={
+                        'display': 'flex',
+                        'flex-wrap': 'wrap',
+                        'gap': '10px',
+                        'padding': '10px 0',
+                        'background-color': '#F0F2F5',
+                        'border-radius': '8px'
+                    }
+                ),
+            ],
+            style={'padding': '20px'}
+        ),
+        style=CARD_STYLE,
+        className="mb-4"
+    )
 
 
 
@@ -173,27 +182,28 @@ dark_mode_toggle = dbc.Button(
 )
 
 # 페이지 레이아웃 정의
-layout = dbc.Container(
-    [
+def layout(**kwargs):
+    return dbc.Container(
+        [
 
-        html.Div(
-            [
-                dark_mode_toggle,  # 다크 모드 토글 버튼 추가 (선택 사항)
-                year_checkbox,     # 중앙 연도 선택 체크박스
-                loading_spinner,   # 그래프 섹션 (로딩 스피너 포함)
-            ],
-            style={
-                "margin-left": "0px",  # 사이드바가 없는 경우 0으로 설정
-                "padding": "20px"
-            }
-        )
-    ],
-    fluid=True,
-    style={
-        'background-color': '#E0F7FA',  # 전체 배경색 일관성 유지
-        'padding-top': '70px'            # 네비게이션 바 높이만큼 패딩 추가
-    }
-)
+            html.Div(
+                [
+                    dark_mode_toggle,  # 다크 모드 토글 버튼 추가 (선택 사항)
+                    create_year_checkbox(get_unique_values('연도')),  # 중앙 연도 선택 체크박스
+                    loading_spinner,   # 그래프 섹션 (로딩 스피너 포함)
+                ],
+                style={
+                    "margin-left": "0px",  # 사이드바가 없는 경우 0으로 설정
+                    "padding": "20px"
+                }
+            )
+        ],
+        fluid=True,
+        style={
+            'background-color': '#E0F7FA',  # 전체 배경색 일관성 유지
+            'padding-top': '70px'            # 네비게이션 바 높이만큼 패딩 추가
+        }
+    )
 
 
 # 다크 모드 토글 
@@ -231,23 +241,38 @@ def update_graphs(selected_years, _):
         return [go.Figure()] * 6
 
     # 필터링된 데이터 준비
-    filtered_df = df[df['기록_날짜'].dt.year.isin(selected_years)]
+    weekly_stats = get_aggregate('feedback.weekly_stats')
+    employment_feedback = get_aggregate('feedback.employment_feedback')  # 상태별 피드백은 연도와 무관하게 집계됨
+    category_sales = get_aggregate('feedback.category_sales')
+    salary_stats = get_aggregate('feedback.salary_stats')
+    feedback_groups = get_aggregate('feedback.feedback_groups')
     filtered_weekly_stats = weekly_stats[weekly_stats['주'].dt.year.isin(selected_years)]
-    filtered_employment_feedback = employment_feedback  # 상태별 피드백은 연도와 무관하게 집계됨
-    filtered_category_sales = category_sales[category_sales['직원_ID'].isin(employee_options)]
     filtered_salary_stats = salary_stats[salary_stats['기록_날짜'].dt.year.isin(selected_years)]
-    filtered_distance_feedback = filtered_df
+    filtered_df = feedback_groups[feedback_groups['연도'].isin(selected_years)]
 
     # 1. 주 단위 총 근무 시간에 따른 피드백 점수 변화
-    fig1 = px.scatter(
-        filtered_weekly_stats,
-        x='총_근무_시간', y='평균_피드백_점수', color='직원_ID',
-        title='주 단위 총 근무 시간에 따른 피드백 점수 변화',
-        labels={'총_근무_시간': '총 근무 시간 (시간)', '평균_피드백_점수': '평균 피드백 점수'},
-        color_discrete_sequence=px.colors.sequential.Viridis,
-        opacity=0.7,
-        template='plotly_white'
-    )
+    # 점 수에 따라 SVG / WebGL 산점도 또는 밀도 이미지로 표시
+    started = time.perf_counter()
+    scatter_mode = render_mode(len(filtered_weekly_stats))
+    if scatter_mode == 'raster':
+        fig1 = go.Figure(
+            density_trace(
+                filtered_weekly_stats['총_근무_시간'], filtered_weekly_stats['평균_피드백_점수'],
+                colorscale='Viridis', hover_label='직원-주 수'
+            ),
+            layout=dict(title='주 단위 총 근무 시간에 따른 피드백 점수 변화', template='plotly_white')
+        )
+    else:
+        fig1 = px.scatter(
+            filtered_weekly_stats,
+            x='총_근무_시간', y='평균_피드백_점수', color='직원_ID',
+            title='주 단위 총 근무 시간에 따른 피드백 점수 변화',
+            labels={'총_근무_시간': '총 근무 시간 (시간)', '평균_피드백_점수': '평균 피드백 점수'},
+            color_discrete_sequence=px.colors.sequential.Viridis,
+            opacity=0.7,
+            render_mode=scatter_mode,
+            template='plotly_white'
+        )
     fig1.update_layout(
         xaxis_title='총 근무 시간 (시간)',
         yaxis_title='평균 피드백 점수',
@@ -263,6 +288,8 @@ def update_graphs(selected_years, _):
         )
     )
 
+    report_render('weekly-feedback', scatter_mode, len(filtered_weekly_stats), fig1, started)
+
     # 2. 정규직, 계약직 여부에 따른 피드백 점수 변화
     fig2 = px.bar(
         employment_feedback,
@@ -314,18 +341,10 @@ def update_graphs(selected_years, _):
     )
 
     # 4. 급여에 따른 피드백 점수 시각화 - Box Plot
-    filtered_df['급여_그룹'] = (filtered_df['직원_급여'] // 100) * 100  # 100만 원 단위로 그룹화
-    fig4 = px.box(
-        filtered_df,
-        x='급여_그룹', y='피드백_점수',
-        title='급여에 따른 피드백 점수 (100만 원 단위 그룹)',
-        labels={'급여_그룹': '급여 (100만 원 단위)', '피드백_점수': '피드백 점수'},
-        points='outliers',  # 이상치만 표시
-        color_discrete_sequence=px.colors.sequential.Aggrnyl,
-        template='plotly_white'
-    )
+    fig4 = create_box_figure(filtered_df, '급여_그룹', '피드백_점수', px.colors.sequential.Aggrnyl[0])
     fig4.update_xaxes(tickformat=',', categoryorder='category ascending')
     fig4.update_layout(
+        title='급여에 따른 피드백 점수 (100만 원 단위 그룹)',
         xaxis_title='급여 (100만 원 단위)',
         yaxis_title='피드백 점수',
         showlegend=False,
@@ -368,17 +387,9 @@ def update_graphs(selected_years, _):
     )
 
     # 6. 매장 거리와 피드백 점수 사이의 관계 - Box Plot
-    filtered_df['거리_그룹'] = (filtered_df['직원_매장_거리'] // 1) * 1  # 1km 단위로 그룹화
-    fig6 = px.box(
-        filtered_df,
-        x='거리_그룹', y='피드백_점수',
-        title='매장 거리와 피드백 점수 사이의 관계 (1km 단위 그룹)',
-        labels={'거리_그룹': '매장 거리 (km 단위)', '피드백_점수': '피드백 점수'},
-        points='outliers',
-        color_discrete_sequence=px.colors.sequential.Plasma,
-        template='plotly_white'
-    )
+    fig6 = create_box_figure(filtered_df, '거리_그룹', '피드백_점수', px.colors.sequential.Plasma[0])
     fig6.update_layout(
+        title='매장 거리와 피드백 점수 사이의 관계 (1km 단위 그룹)',
         xaxis_title='매장 거리 (km 단위)',
         yaxis_title='피드백 점수',
         showlegend=False,
@@ -4,18 +4,14 @@ from dash import dcc, html, Input, Output
 import dash_bootstrap_components as dbc
 import pandas as pd
 import numpy as np
-from prophet import Prophet
 import plotly.graph_objects as go
 from dash.exceptions import PreventUpdate
-from data_processing import load_data
+from data_processing import cache_by_generation, data_store, get_working_data
+from forecast_service import acquire_prefit_lock, forecast_service, is_main_process
 
 # 페이지 등록
 dash.register_page(__name__, path="/prophet_forecast", name="Prophet Forecast")
 
-# 데이터 로드 및 전처리
-df = load_data()
-df_working = df[df['근무_여부'] == '근무']
-
 # 색상 맵 정의 (파스텔 톤)
 COLOR_MAP = {
     '근무': '#AEC6CF',       # 파스텔 블루
@@ -41,195 +37,229 @@ GRAPH_CARD_STYLE = {
     'background-color': '#FFFFFF',  
 }
 
-# 고유 카테고리 리스트 추출
-unique_categories = sorted(df_working['매장_카테고리'].dropna().unique())
+# 근무 기록이 있는 카테고리 목록 (데이터 세대별 캐시)
+@cache_by_generation
+def forecast_categories(df):
+    return sorted(df.loc[df['근무_여부'] == '근무', '매장_카테고리'].dropna().unique())
+
+# 데이터가 다시 로드되면 모든 카테고리의 예측 모델을 다시 학습
+# (예측 결과는 forecast_service의 카테고리별 예측 테이블에서 읽음)
+def prefit_forecasts(*_):
+    forecast_service.prefit(get_working_data())
+
+# 시작 시 모든 카테고리의 예측 모델을 백그라운드 프로세스에서 미리 학습
+# 웹 서버 워커가 여러 개면 잠금을 얻은 한 워커만 미리 학습 (나머지는 예측 테이블을 읽음)
+if is_main_process() and acquire_prefit_lock():
+    prefit_forecasts()
+    data_store.add_reload_listener(prefit_forecasts)
 
 # 페이지 레이아웃 정의
-layout = dbc.Container(
-    [
-        # 페이지 제목
-        dbc.Row(
-            dbc.Col(
-                html.H1(
-                    [
-                        html.I(className="fas fa-chart-line mr-3"),  # FontAwesome 아이콘 추가
-                        "Sales Forecast Dashboard"
-                    ],
-                    style={
-                        'text-align': 'center',
-                        'margin-bottom': '20px',
-                        'color': '#004d40', 
-                        'font-family': 'Arial, sans-serif',
-                        'font-weight': 'bold'
-                    }
-                ),
-                width=12
-            )
-        ),
-        
-        # 필터 섹션 추가: 카테고리 선택을 위한 라디오 버튼
-        dbc.Row(
-            dbc.Col(
-                dbc.Card(
-                    dbc.CardBody(
+def layout(**kwargs):
+    unique_categories = forecast_categories()
+    return dbc.Container(
+        [
+            # 페이지 제목
+            dbc.Row(
+                dbc.Col(
+                    html.H1(
                         [
-                            html.Label("매장 카테고리 선택", style={'font-weight': 'bold', 'font-size': '1.1em'}),
-                            dbc.RadioItems(
-                                options=[
-                                    {'label': category, 'value': category} for category in unique_categories
-                                ],
-                                value=unique_categories[0] if unique_categories else None,  # 기본 선택값 설정
-                                id='category-radio',
-                                inline=True,
-                                className="mt-2"
-                            )
-                        ]
+                            html.I(className="fas fa-chart-line mr-3"),  # FontAwesome 아이콘 추가
+                            "Sales Forecast Dashboard"
+                        ],
+                        style={
+                            'text-align': 'center',
+                            'margin-bottom': '20px',
+                            'color': '#004d40', 
+                            'font-family': 'Arial, sans-serif',
+                            'font-weight': 'bold'
+                        }
                     ),
-                    style=FILTER_CARD_STYLE
-                ),
-                width=12,
-                className="mb-4"
-            )
-        ),
-        
-        # 그래프 섹션
-        dbc.Spinner(  # 로딩 스피너 추가
-            children=dbc.Row(
-                [
-                    dbc.Col(
-                        dbc.Card(
+                    width=12
+                )
+            ),
+            
+            # 필터 섹션 추가: 카테고리 선택을 위한 라디오 버튼
+            dbc.Row(
+                dbc.Col(
+                    dbc.Card(
+                        dbc.CardBody(
                             [
-                                dbc.CardHeader(
-                                    [
-                                        html.I(className="fas fa-chart-area mr-2"),
-                                        "실제 매출액 및 예측 매출액"
+                                html.Label("매장 카테고리 선택", style={'font-weight': 'bold', 'font-size': '1.1em'}),
+                                dbc.RadioItems(
+                                    options=[
+                                        {'label': category, 'value': category} for category in unique_categories
                                     ],
-                                    className="bg-primary text-white"
-                                ),
-                                dbc.CardBody(
-                                    dcc.Graph(id='sales-forecast-plot', config={'displayModeBar': False})
+                                    value=unique_categories[0] if unique_categories else None,  # 기본 선택값 설정
+                                    id='category-radio',
+                                    inline=True,
+                                    className="mt-2"
                                 )
-                            ],
-                            style=GRAPH_CARD_STYLE
+                            ]
                         ),
-                        width=12,
-                        lg=6,
-                        className="mb-4"
+                        style=FILTER_CARD_STYLE
                     ),
-                    dbc.Col(
-                        dbc.Card(
-                            [
-                                dbc.CardHeader(
-                                    [
-                                        html.I(className="fas fa-trend-up mr-2"),
-                                        "예측 트렌드"
-                                    ],
-                                    className="bg-success text-white"
-                                ),
-                                dbc.CardBody(
-                                    dcc.Graph(id='forecast-trend-plot', config={'displayModeBar': False})
-                                )
-                            ],
-                            style=GRAPH_CARD_STYLE
+                    width=12,
+                    className="mb-4"
+                )
+            ),
+            
+            # 그래프 섹션
+            dbc.Spinner(  # 로딩 스피너 추가
+                children=dbc.Row(
+                    [
+                        dbc.Col(
+                            dbc.Card(
+                                [
+                                    dbc.CardHeader(
+                                        [
+                                            html.I(className="fas fa-chart-area mr-2"),
+                                            "실제 매출액 및 예측 매출액"
+                                        ],
+                                        className="bg-primary text-white"
+                                    ),
+                                    dbc.CardBody(
+                                        dcc.Graph(id='sales-forecast-plot', config={'displayModeBar': False})
+                                    )
+                                ],
+                                style=GRAPH_CARD_STYLE
+                            ),
+                            width=12,
+                            lg=6,
+                            className="mb-4"
                         ),
-                        width=12,
-                        lg=6,
-                        className="mb-4"
-                    ),
-                ],
-                className="mb-4"
-            )
-        ),
-        
-        dbc.Spinner(
-            children=dbc.Row(
-                [
-                    dbc.Col(
-                        dbc.Card(
-                            [
-                                dbc.CardHeader(
-                                    [
-                                        html.I(className="fas fa-seasonal-weather mr-2"),
-                                        "연간 주기성"
-                                    ],
-                                    className="bg-warning text-white"
-                                ),
-                                dbc.CardBody(
-                                    dcc.Graph(id='forecast-seasonality-plot', config={'displayModeBar': False})
-                                )
-                            ],
-                            style=GRAPH_CARD_STYLE
+                        dbc.Col(
+                            dbc.Card(
+                                [
+                                    dbc.CardHeader(
+                                        [
+                                            html.I(className="fas fa-trend-up mr-2"),
+                                            "예측 트렌드"
+                                        ],
+                                        className="bg-success text-white"
+                                    ),
+                                    dbc.CardBody(
+                                        dcc.Graph(id='forecast-trend-plot', config={'displayModeBar': False})
+                                    )
+                                ],
+                                style=GRAPH_CARD_STYLE
+                            ),
+                            width=12,
+                            lg=6,
+                            className="mb-4"
                         ),
-                        width=12,
-                        lg=6,
-                        className="mb-4"
-                    ),
-                    dbc.Col(
-                        dbc.Card(
-                            [
-                                dbc.CardHeader(
-                                    [
-                                        html.I(className="fas fa-calendar-week mr-2"),
-                                        "요일별 주기성"
-                                    ],
-                                    className="bg-danger text-white"
-                                ),
-                                dbc.CardBody(
-                                    dcc.Graph(id='forecast-weekly-plot', config={'displayModeBar': False})
-                                )
-                            ],
-                            style=GRAPH_CARD_STYLE
+                    ],
+                    className="mb-4"
+                )
+            ),
+            
+            dbc.Spinner(
+                children=dbc.Row(
+                    [
+                        dbc.Col(
+                            dbc.Card(
+                                [
+                                    dbc.CardHeader(
+                                        [
+                                            html.I(className="fas fa-seasonal-weather mr-2"),
+                                            "연간 주기성"
+                                        ],
+                                        className="bg-warning text-white"
+                                    ),
+                                    dbc.CardBody(
+                                        dcc.Graph(id='forecast-seasonality-plot', config={'displayModeBar': False})
+                                    )
+                                ],
+                                style=GRAPH_CARD_STYLE
+                            ),
+                            width=12,
+                            lg=6,
+                            className="mb-4"
                         ),
-                        width=12,
-                        lg=6,
-                        className="mb-4"
-                    ),
-                ],
-                className="mb-4"
-            )
-        ),
-    ],
-    fluid=True,
-    style={'background-color': '#004d40', 'padding': '20px', 'border-radius': '10px'},  
-    className="bg-light" 
-)
+                        dbc.Col(
+                            dbc.Card(
+                                [
+                                    dbc.CardHeader(
+                                        [
+                                            html.I(className="fas fa-calendar-week mr-2"),
+                                            "요일별 주기성"
+                                        ],
+                                        className="bg-danger text-white"
+                                    ),
+                                    dbc.CardBody(
+                                        dcc.Graph(id='forecast-weekly-plot', config={'displayModeBar': False})
+                                    )
+                                ],
+                                style=GRAPH_CARD_STYLE
+                            ),
+                            width=12,
+                            lg=6,
+                            className="mb-4"
+                        ),
+                    ],
+                    className="mb-4"
+                )
+            ),
+            # 모델 학습이 끝날 때까지 주기적으로 결과 확인
+            dcc.Interval(id='forecast-poll', interval=3000, disabled=True),
+        ],
+        fluid=True,
+        style={'background-color': '#004d40', 'padding': '20px', 'border-radius': '10px'},  
+        className="bg-light" 
+    )
 
 # 데이터 필터링 함수 정의
 def filter_data_by_category(selected_category):
+    df_working = get_working_data()
     if selected_category:
         filtered_df = df_working[df_working['매장_카테고리'] == selected_category]
     else:
-        filtered_df = df_working.copy()
+        filtered_df = df_working
     return filtered_df
 
+# 모델 학습 중 또는 실패 시 표시할 안내 Figure
+def create_placeholder_figure(message):
+    fig = go.Figure()
+    fig.update_layout(
+        xaxis={'visible': False},
+        yaxis={'visible': False},
+        annotations=[dict(text=message, showarrow=False, font=dict(size=16, color='#333'))],
+        template='plotly_white'
+    )
+    return fig
+
 # 콜백 함수 정의
 @dash.callback(
     [
         Output('sales-forecast-plot', 'figure'),
         Output('forecast-trend-plot', 'figure'),
         Output('forecast-seasonality-plot', 'figure'),
-        Output('forecast-weekly-plot', 'figure')
+        Output('forecast-weekly-plot', 'figure'),
+        Output('forecast-poll', 'disabled')
     ],
-    Input('category-radio', 'value')  # 카테고리 선택을 Input으로 사용
+    [
+        Input('category-radio', 'value'),  # 카테고리 선택을 Input으로 사용
+        Input('forecast-poll', 'n_intervals')
+    ]
 )
-def update_forecast_graph(selected_category):
+def update_forecast_graph(selected_category, _):
     filtered_df = filter_data_by_category(selected_category)
     
     # 근무 중인 데이터만 사용하여 일별 매출액 집계
     daily_sales = filtered_df.groupby('기록_날짜')['매출액'].sum().reset_index()
     daily_sales.columns = ['ds', 'y']
     
-    # Prophet 모델 생성 및 훈련
     if daily_sales.empty:
         # 데이터가 없을 경우 빈 Figure 반환
-        return go.Figure(), go.Figure(), go.Figure(), go.Figure()
-    
-    model = Prophet()
-    model.fit(daily_sales)
+        return go.Figure(), go.Figure(), go.Figure(), go.Figure(), True
     
-    # 미래 예측 (180일)
-    future = model.make_future_dataframe(periods=180)
-    forecast = model.predict(future)
+    # 백그라운드에서 학습된 예측 결과 조회 (180일 예측)
+    forecast, status = forecast_service.get_forecast(get_working_data(), selected_category)
+    if forecast is None:
+        if status == 'pending':
+            placeholder = create_placeholder_figure('예측 모델을 학습하는 중입니다...')
+            return placeholder, placeholder, placeholder, placeholder, False
+        placeholder = create_placeholder_figure('예측 모델 학습에 실패했습니다.')
+        return placeholder, placeholder, placeholder, placeholder, True
     
     # 실제 매출액 및 예측 매출액 시각화
     fig1 = go.Figure()
@@ -322,8 +352,9 @@ def update_forecast_graph(selected_category):
     
     # Prophet에서 주간 주기성을 추출하여 요일별 평균으로 재구성
     # 요일에 따른 주기성을 추출 (주기를 맞추기 위해 modulo 연산 사용)
-    forecast['day_of_week'] = forecast['ds'].dt.dayofweek  # 요일을 숫자로 변환 (0: Monday, ..., 6: Sunday)
-    weekly_means = forecast.groupby('day_of_week')['weekly'].mean().reindex(range(7))  # 요일 순서대로 정렬
+    # (캐시된 forecast는 여러 요청이 공유하므로 컬럼을 추가하지 않음)
+    day_of_week = forecast['ds'].dt.dayofweek.rename('day_of_week')  # 요일을 숫자로 변환 (0: Monday, ..., 6: Sunday)
+    weekly_means = forecast['weekly'].groupby(day_of_week).mean().reindex(range(7))  # 요일 순서대로 정렬
     
     # 주간 주기성 플롯 생성
     fig4 = go.Figure()
@@ -345,4 +376,4 @@ def update_forecast_graph(selected_category):
         margin=dict(t=50, b=40, l=40, r=20)
     )
     
-    return fig1, fig2, fig3, fig4
+    return fig1, fig2, fig3, fig4, True
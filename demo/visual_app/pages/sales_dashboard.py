@@ -6,14 +6,27 @@ import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 from dash.exceptions import PreventUpdate
-from data_processing import load_data
+from data_processing import get_unique_values, cache_by_generation
+from figure_cache import FigureCache, make_key
 
 # 페이지 등록
 dash.register_page(__name__, path="/sales-dashboard", name="Sales Dashboard")
 
-# 데이터 전처리
-df = load_data()  # 전처리 함수 호출
-df_working = df[df['근무_여부'] == '근무']
+# (연도, 월, 매장_카테고리)별 판매량/매출액 합계와 근무 건수 집계 큐브
+# 데이터 세대별로 한 번만 계산하고, 콜백에서는 큐브를 잘라서 재집계만 수행
+@cache_by_generation
+def get_monthly_cube(df):
+    df_working = df[df['근무_여부'] == '근무']
+    cube = df_working.groupby(['연도', '월', '매장_카테고리'], observed=True, dropna=False).agg(
+        판매량=('판매량', 'sum'),
+        매출액=('매출액', 'sum'),
+        근무_건수=('근무_여부', 'size')
+    ).reset_index()
+    cube.attrs['source_hash'] = df.attrs.get('source_hash')
+    return cube
+
+# 연도 선택 조합별 Figure 캐시 (데이터가 다시 로드되면 원본 해시가 바뀌어 자동으로 무효화)
+figure_cache = FigureCache('sales_dashboard')
 
 # 색상 맵 정의 (파스텔 톤)
 COLOR_MAP = {
@@ -71,39 +84,40 @@ def create_card(title, graph_id):
     )
 
 # 중앙 연도 선택 체크박스 컴포넌트 생성
-year_checkbox = dbc.Card(
-    dbc.CardBody(
-        [
-            html.Label(
-                "연도 선택",
-                style={
-                    'font-weight': 'bold',
-                    'font-size': '16px',
-                    'margin-bottom': '10px',
-                    'color': '#007BFF'
-                }
-            ),
-            dbc.Checklist(
-                options=[{'label': str(year), 'value': year} for year in sorted(df['연도'].unique())],
-                value=sorted(df['연도'].unique()),  # 기본적으로 모든 연도가 선택됨
-                id="year-checkbox",
-                inline=True,
-                switch=True,
-                style={
-                    'display': 'flex', 
-                    'flex-wrap': 'wrap', 
-                    'gap': '10px', 
-                    'padding': '10px 0', 
-                    'background-color': '#F0F2F5',
-                    'border-radius': '8px'
-                }
-            ),
-        ],
-        style={'padding': '20px'}
-    ),
-    style=FILTER_CARD_STYLE,
-    className="mb-4"
-)
+def create_year_checkbox(years):
+    return dbc.Card(
+        dbc.CardBody(
+            [
+                html.Label(
+                    "연도 선택",
+                    style={
+                        'font-weight': 'bold',
+                        'font-size': '16px',
+                        'margin-bottom': '10px',
+                        'color': '#007BFF'
+                    }
+                ),
+                dbc.Checklist(
+                    options=[{'label': str(year), 'value': year} for year in years],
+                    value=years,  # 기본적으로 모든 연도가 선택됨
+                    id="year-checkbox",
+                    inline=True,
+                    switch=True,
+                    style={
+                        'display': 'flex', 
+                        'flex-wrap': 'wrap', 
+                        'gap': '10px', 
+                        'padding': '10px 0', 
+                        'background-color': '#F0F2F5',
+                        'border-radius': '8px'
+                    }
+                ),
+            ],
+            style={'padding': '20px'}
+        ),
+        style=FILTER_CARD_STYLE,
+        className="mb-4"
+    )
 
 
 
@@ -133,24 +147,25 @@ loading_spinner = dbc.Spinner(
 )
 
 # 페이지 레이아웃 정의
-layout = dbc.Container(
-    [
-        html.Div(
-            [
-                year_checkbox,  # 중앙 연도 선택 체크박스
-                loading_spinner,  # 그래프 섹션 (로딩 스피너 포함)
-            ],
-            style={
-                "padding": "20px"
-            }
-        )
-    ],
-    fluid=True,
-    style={
-        'background-color': '#E0F7FA', 
-        'padding-top': '70px'  # 네비게이션 바 높이만큼 패딩 추가
-    }
-)
+def layout(**kwargs):
+    return dbc.Container(
+        [
+            html.Div(
+                [
+                    create_year_checkbox(get_unique_values('연도')),  # 중앙 연도 선택 체크박스
+                    loading_spinner,  # 그래프 섹션 (로딩 스피너 포함)
+                ],
+                style={
+                    "padding": "20px"
+                }
+            )
+        ],
+        fluid=True,
+        style={
+            'background-color': '#E0F7FA', 
+            'padding-top': '70px'  # 네비게이션 바 높이만큼 패딩 추가
+        }
+    )
 
 # 그래프 보이기/숨기기 콜백 함수
 @dash.callback(
@@ -174,25 +189,15 @@ def toggle_graphs(selected_graphs):
         {'display': 'block'} if 'average-revenue-per-shift-col' in selected_graphs else {'display': 'none'},
     ]
 
-# 콜백 함수: 그래프 업데이트 (연도 선택 체크박스 기반)
-@dash.callback(
-    [
-        Output('monthly-sales', 'figure'),
-        Output('monthly-revenue', 'figure'),
-        Output('category-sales', 'figure'),
-        Output('category-revenue', 'figure'),
-        Output('average-sales-per-shift', 'figure'),
-        Output('average-revenue-per-shift', 'figure'),
-    ],
-    [Input('year-checkbox', 'value')]
-)
-def update_graphs(selected_years):
-    if not selected_years:
-        return [go.Figure()] * 6
+# 선택된 연도의 그래프 6개 생성
+def create_figures(cube, selected_years):
+    # 선택된 연도의 큐브 조각과 연도/월 합계
+    filtered_cube = cube[cube['연도'].isin(selected_years)]
+    monthly_totals = filtered_cube.groupby(['연도', '월'])[['판매량', '매출액', '근무_건수']].sum().reset_index()
+    category_cube = filtered_cube[filtered_cube['매장_카테고리'].notna()]
 
     # 연도별 월별 총 판매량 변화
-    filtered_df = df_working[df_working['연도'].isin(selected_years)]
-    monthly_total_sales = filtered_df.groupby(['연도', '월'])['판매량'].sum().reset_index()
+    monthly_total_sales = monthly_totals[['연도', '월', '판매량']]
     fig_sales = px.line(
         monthly_total_sales,
         x='월', y='판매량', color='연도',
@@ -214,7 +219,7 @@ def update_graphs(selected_years):
     )
 
     # 연도별 월별 총 매출액 변화
-    monthly_total_revenue = filtered_df.groupby(['연도', '월'])['매출액'].sum().reset_index()
+    monthly_total_revenue = monthly_totals[['연도', '월', '매출액']]
     fig_revenue = px.line(
         monthly_total_revenue,
         x='월', y='매출액', color='연도',
@@ -236,7 +241,7 @@ def update_graphs(selected_years):
     )
 
     # 카테고리별 월별 총 판매량 변화
-    monthly_sales = filtered_df.groupby(['연도', '월', '매장_카테고리'])['판매량'].sum().reset_index()
+    monthly_sales = category_cube[['연도', '월', '매장_카테고리', '판매량']]
     fig_category_sales = px.area(
         monthly_sales,
         x='월', y='판매량', color='매장_카테고리', line_group='연도',
@@ -258,7 +263,7 @@ def update_graphs(selected_years):
     )
 
     # 카테고리별 월별 총 매출액 변화
-    monthly_revenue = filtered_df.groupby(['연도', '월', '매장_카테고리'])['매출액'].sum().reset_index()
+    monthly_revenue = category_cube[['연도', '월', '매장_카테고리', '매출액']]
     fig_category_revenue = px.area(
         monthly_revenue,
         x='월', y='매출액', color='매장_카테고리', line_group='연도',
@@ -280,10 +285,7 @@ def update_graphs(selected_years):
     )
 
     # 연도별 월별 평균 판매량 (근무당)
-    monthly_stats_sales = filtered_df.groupby(['연도', '월']).agg(
-        총_판매량=('판매량', 'sum'),
-        근무_건수=('근무_여부', 'count')
-    ).reset_index()
+    monthly_stats_sales = monthly_totals.rename(columns={'판매량': '총_판매량'})[['연도', '월', '총_판매량', '근무_건수']]
     monthly_stats_sales['평균_판매량_근무당'] = monthly_stats_sales['총_판매량'] / monthly_stats_sales['근무_건수']
     fig_avg_sales = px.line(
         monthly_stats_sales,
@@ -306,10 +308,7 @@ def update_graphs(selected_years):
     )
 
     # 연도별 월별 평균 매출액 (근무당)
-    monthly_stats_revenue = filtered_df.groupby(['연도', '월']).agg(
-        총_매출액=('매출액', 'sum'),
-        근무_건수=('근무_여부', 'count')
-    ).reset_index()
+    monthly_stats_revenue = monthly_totals.rename(columns={'매출액': '총_매출액'})[['연도', '월', '총_매출액', '근무_건수']]
     monthly_stats_revenue['평균_매출액_근무당'] = monthly_stats_revenue['총_매출액'] / monthly_stats_revenue['근무_건수']
     fig_avg_revenue = px.line(
         monthly_stats_revenue,
@@ -332,3 +331,23 @@ def update_graphs(selected_years):
     )
 
     return fig_sales, fig_revenue, fig_category_sales, fig_category_revenue, fig_avg_sales, fig_avg_revenue
+
+# 콜백 함수: 그래프 업데이트 (연도 선택 체크박스 기반)
+@dash.callback(
+    [
+        Output('monthly-sales', 'figure'),
+        Output('monthly-revenue', 'figure'),
+        Output('category-sales', 'figure'),
+        Output('category-revenue', 'figure'),
+        Output('average-sales-per-shift', 'figure'),
+        Output('average-revenue-per-shift', 'figure'),
+    ],
+    [Input('year-checkbox', 'value')]
+)
+def update_graphs(selected_years):
+    if not selected_years:
+        return [go.Figure()] * 6
+
+    cube = get_monthly_cube()
+    key = make_key(cube.attrs.get('source_hash'), frozenset(selected_years))
+    return figure_cache.get_or_create(key, lambda: create_figures(cube, selected_years))
@@ -1,50 +1,78 @@
+import hashlib
+import threading
 import dash
 from dash import dcc, html, Input, Output
 import dash_bootstrap_components as dbc
 import pandas as pd
 import plotly.graph_objects as go
 import numpy as np
-from data_processing import load_data
+from data_processing import cache_by_generation, data_store, get_data, get_unique_values
+from figure_cache import FigureCache, make_key
+from occupancy import HOURS, employee_occupancy, employee_palette, get_coverage, slot_colors, slot_labels, to_hex
 
 # 페이지 등록
 dash.register_page(__name__, path="/schedule_dashboard", name="Schedule Dashboard")
 
-# 색상 혼합 함수 (두 색상 혼합)
-def mix_colors(color1, color2):
-    c1 = np.array([int(color1[i:i+2], 16) for i in (1, 3, 5)])
-    c2 = np.array([int(color2[i:i+2], 16) for i in (1, 3, 5)])
-    mixed = (c1 + c2) // 2
-    return f'#{mixed[0]:02x}{mixed[1]:02x}{mixed[2]:02x}'
-
-# 다중 색상 혼합 함수 
-def mix_multiple_colors(colors):
-    rgb_values = [np.array([int(color[i:i+2], 16) for i in (1, 3, 5)]) for color in colors]
-    # 색상값 평균 사용
-    mixed_rgb = np.mean(rgb_values, axis=0).astype(int)
-    return f'#{mixed_rgb[0]:02x}{mixed_rgb[1]:02x}{mixed_rgb[2]:02x}'
-
-# 데이터 로드
-df = load_data()  # 전처리 함수 호출
-
-# 근무 상태 컬럼 추가
-df['근무상태'] = df['근무_여부'].apply(lambda x: 
-    '근무' if x == '근무' else 
-    '휴식중' if x == '휴식중' else 
-    '대기중' if x == '대기중' else 
-    'NONE'
-)
+# 근무상태, 피드백_점수_그룹, 파견횟수_그룹 컬럼은 data_processing.preprocess_data에서 생성됨
 
-# 피드백 점수 그룹화
-df['피드백_점수_그룹'] = pd.cut(
-    df['피드백_점수'],
-    bins=[-1.0, -0.6, -0.2, 0.2, 0.6, 1.0],
-    labels=['강하게 부정적', '부정적', '중립적', '긍정적', '강하게 긍정적'],
-    right=False,
-    include_lowest=True
-)
+# 매장별 달력 비활성화 날짜 인덱스
+# 매장 -> (기록 날짜 지문, 정렬된 기록 날짜 배열, 비활성화 날짜 목록)
+# 데이터가 다시 로드되면 기록 날짜가 바뀐 매장만 다시 계산
+class StoreCalendarIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._range = None      # (전체 시작일, 전체 종료일)
+        self._stores = {}
+        self._all_disabled = []  # 기록이 없는 매장은 모든 날짜 비활성화
+
+    def rebuild(self, data):
+        if data is None or data.empty:
+            return
+        dates = data['기록_날짜'].to_numpy(dtype='datetime64[D]')
+        start, end = dates.min(), dates.max()
+        all_dates = np.arange(start, end + np.timedelta64(1, 'D'))
+        all_labels = np.datetime_as_string(all_dates, unit='D')
+
+        # (매장 코드, 날짜 오프셋) 쌍을 하나의 정수 키로 만들어 정렬·중복 제거
+        stores = data['매장_ID'].astype('category')
+        codes = stores.cat.codes.to_numpy().astype(np.int64)
+        offsets = (dates - start).astype(np.int64)
+        valid = codes >= 0
+        keys = np.unique(codes[valid] * len(all_dates) + offsets[valid])
+        bounds = np.searchsorted(keys // len(all_dates), np.arange(len(stores.cat.categories) + 1))
+
+        # 전체 기간이 같을 때만 이전 결과를 재사용
+        with self._lock:
+            previous = self._stores if self._range == (start, end) else {}
+        index = {}
+        for code, store in enumerate(stores.cat.categories):
+            store_offsets = keys[bounds[code]:bounds[code + 1]] % len(all_dates)
+            if len(store_offsets) == 0:
+                continue
+            fingerprint = hashlib.blake2b(store_offsets.tobytes(), digest_size=16).digest()
+            entry = previous.get(store)
+            if entry is None or entry[0] != fingerprint:
+                mask = np.ones(len(all_dates), dtype=bool)
+                mask[store_offsets] = False
+                entry = (fingerprint, all_dates[store_offsets], all_labels[mask].tolist())
+            index[store] = entry
 
-# 파견 횟수를 그룹화
-df['파견횟수_그룹'] = (df['파견횟수'] // 5) * 5
+        with self._lock:
+            self._range = (start, end)
+            self._stores = index
+            self._all_disabled = all_labels.tolist()
+
+    def disabled_days(self, store):
+        with self._lock:
+            entry = self._stores.get(store)
+            return entry[2] if entry is not None else self._all_disabled
+
+# 매장/날짜별 시간표 Figure 캐시 (직원 색상이 고정되어 있어 데이터가 같으면 결과도 같음)
+figure_cache = FigureCache('schedule_dashboard')
+
+calendar_index = StoreCalendarIndex()
+calendar_index.rebuild(get_data())
+data_store.add_reload_listener(lambda data, generation: calendar_index.rebuild(data))
 
 # 카드 스타일 정의
 FILTER_CARD_STYLE = {
@@ -63,6 +91,11 @@ GRAPH_CARD_STYLE = {
     'background-color': '#FFFFFF',  
 }
 
+# 히트맵 월 선택 목록 (YYYY-MM, 데이터 세대별 캐시)
+@cache_by_generation
+def coverage_months(data):
+    return sorted(data['기록_날짜'].dt.strftime('%Y-%m').dropna().unique())
+
 # 색상 맵 정의 (파스텔 톤)
 COLOR_MAP = {
     '근무': '#AEC6CF',      
@@ -71,136 +104,177 @@ COLOR_MAP = {
     'NONE': '#CFCFC4'        
 }
 
-# 페이지 레이아웃 정의
-layout = dbc.Container(
-    [
-        # 페이지 제목
-        html.H1(
-            "Schedule Dashboard",
-            className="text-center my-4",
-            style={
-                'font-weight': 'bold',
-                'font-size': '2.5em',
-                'color': '#333'
-            }
-        ),
-        
-        # 필터 섹션
-        dbc.Row(
-            [
-                dbc.Col(
-                    dbc.Card(
-                        dbc.CardBody(
-                            [
-                                html.Label(
-                                    "매장 선택",
-                                    style={
-                                        'font-weight': 'bold',
-                                        'font-size': '16px',
-                                        'margin-bottom': '5px',
-                                        'color': '#007BFF'
-                                    }
-                                ),
-                                dcc.Dropdown(
-                                    id='store-selector',
-                                    options=[
-                                        {'label': store, 'value': store} 
-                                        for store in sorted(df['매장_ID'].dropna().unique())
-                                    ],
-                                    placeholder="매장 선택",
-                                    style={
-                                        'width': '100%',
-                                        'border': '1px solid #007BFF',
-                                        'border-radius': '5px',
-                                        'padding': '10px',
-                                        'font-size': '14px',
-                                        'color': '#333'
-                                    }
-                                )
-                            ],
-                            style={
-                                'display': 'flex',
-                                'flex-direction': 'column',
-                                'justify-content': 'center',
-                                'height': '100px'  
-                            }
+# 페이지 레이아웃 정의 (페이지를 열 때마다 생성하여 다시 로드된 데이터의 매장/월 목록을 반영)
+def layout(**kwargs):
+    stores = get_unique_values('매장_ID')
+    months = coverage_months()
+    return dbc.Container(
+        [
+            # 페이지 제목
+            html.H1(
+                "Schedule Dashboard",
+                className="text-center my-4",
+                style={
+                    'font-weight': 'bold',
+                    'font-size': '2.5em',
+                    'color': '#333'
+                }
+            ),
+            
+            # 필터 섹션
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody(
+                                [
+                                    html.Label(
+                                        "매장 선택",
+                                        style={
+                                            'font-weight': 'bold',
+                                            'font-size': '16px',
+                                            'margin-bottom': '5px',
+                                            'color': '#007BFF'
+                                        }
+                                    ),
+                                    dcc.Dropdown(
+                                        id='store-selector',
+                                        options=[
+                                            {'label': store, 'value': store} 
+                                            for store in stores
+                                        ],
+                                        placeholder="매장 선택",
+                                        style={
+                                            'width': '100%',
+                                            'border': '1px solid #007BFF',
+                                            'border-radius': '5px',
+                                            'padding': '10px',
+                                            'font-size': '14px',
+                                            'color': '#333'
+                                        }
+                                    )
+                                ],
+                                style={
+                                    'display': 'flex',
+                                    'flex-direction': 'column',
+                                    'justify-content': 'center',
+                                    'height': '100px'  
+                                }
+                            ),
+                            style=FILTER_CARD_STYLE
                         ),
-                        style=FILTER_CARD_STYLE
+                        width=6
                     ),
-                    width=6
-                ),
-                dbc.Col(
-                    dbc.Card(
-                        dbc.CardBody(
-                            [
-                                html.Label(
-                                    "날짜 선택",
-                                    style={
-                                        'font-weight': 'bold',
-                                        'font-size': '16px',
-                                        'margin-bottom': '5px',
-                                        'color': '#007BFF'
-                                    }
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody(
+                                [
+                                    html.Label(
+                                        "날짜 선택",
+                                        style={
+                                            'font-weight': 'bold',
+                                            'font-size': '16px',
+                                            'margin-bottom': '5px',
+                                            'color': '#007BFF'
+                                        }
+                                    ),
+                                    html.Div(style={'height': '10px'}),  
+                                    dcc.DatePickerSingle(
+                                        id='date-picker',
+                                        placeholder='날짜 선택',
+                                        style={
+                                            'width': '100%',
+                                            'border': '1px solid #007BFF',
+                                            'border-radius': '5px',
+                                            'padding': '10px',
+                                            'font-size': '14px',
+                                            'color': '#333'
+                                        }
+                                    )
+                                ],
+                                style={
+                                    'display': 'flex',
+                                    'flex-direction': 'column',
+                                    'justify-content': 'center',
+                                    'height': '100px'  
+                                }
+                            ),
+                            style=FILTER_CARD_STYLE
+                        ),
+                        width=6
+                    )
+                ],
+                className="mb-4"
+            ),
+            
+            # 그래프 섹션
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody(
+                                dcc.Graph(
+                                    id='schedule-plot',
+                                    config={'displayModeBar': False},
+                                    style={'height': '600px'}  
                                 ),
-                                html.Div(style={'height': '10px'}),  
-                                dcc.DatePickerSingle(
-                                    id='date-picker',
-                                    placeholder='날짜 선택',
-                                    style={
-                                        'width': '100%',
-                                        'border': '1px solid #007BFF',
-                                        'border-radius': '5px',
-                                        'padding': '10px',
-                                        'font-size': '14px',
-                                        'color': '#333'
-                                    }
-                                )
-                            ],
-                            style={
-                                'display': 'flex',
-                                'flex-direction': 'column',
-                                'justify-content': 'center',
-                                'height': '100px'  
-                            }
+                            ),
+                            style=GRAPH_CARD_STYLE
                         ),
-                        style=FILTER_CARD_STYLE
-                    ),
-                    width=6
-                )
-            ],
-            className="mb-4"
-        ),
-        
-        # 그래프 섹션
-        dbc.Row(
-            [
-                dbc.Col(
-                    dbc.Card(
-                        dbc.CardBody(
-                            dcc.Graph(
-                                id='schedule-plot',
-                                config={'displayModeBar': False},
-                                style={'height': '600px'}  
+                        width=12
+                    )
+                ],
+                className="mb-4"
+            ),
+
+            # 월간 시간대별 근무 인원 히트맵 섹션
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody(
+                                [
+                                    html.Label(
+                                        "월 선택",
+                                        style={
+                                            'font-weight': 'bold',
+                                            'font-size': '16px',
+                                            'margin-bottom': '5px',
+                                            'color': '#007BFF'
+                                        }
+                                    ),
+                                    dcc.Dropdown(
+                                        id='coverage-month',
+                                        options=[{'label': month, 'value': month} for month in months],
+                                        value=months[-1] if months else None,
+                                        clearable=False,
+                                        style={'width': '200px', 'margin-bottom': '10px'}
+                                    ),
+                                    dcc.Graph(
+                                        id='coverage-heatmap',
+                                        config={'displayModeBar': False},
+                                        style={'height': '700px'}
+                                    )
+                                ]
                             ),
+                            style=GRAPH_CARD_STYLE
                         ),
-                        style=GRAPH_CARD_STYLE
-                    ),
-                    width=12
-                )
-            ],
-            className="mb-4"
-        )
-    ],
-    fluid=True,
-    style={
-        'background-color': '#E0F7FA',  
-        'padding': '20px'
-    }
-)
+                        width=12
+                    )
+                ],
+                className="mb-4"
+            )
+        ],
+        fluid=True,
+        style={
+            'background-color': '#E0F7FA',  
+            'padding': '20px'
+        }
+    )
 
 # 데이터 필터링 함수 정의
 def filter_data(selected_store, selected_date):
-    filtered_df = df.copy()
+    filtered_df = get_data()
     if selected_store:
         filtered_df = filtered_df[filtered_df['매장_ID'] == selected_store]
     if selected_date:
@@ -222,12 +296,8 @@ def update_calendar(selected_store):
         # 매장 선택이 없을 경우 모든 날짜를 비활성화하지 않음
         return [], None
 
-    # 매장에 해당하는 근무 날짜 가져오기
-    store_dates = df[df['매장_ID'] == selected_store]['기록_날짜'].dt.date.unique()
-    all_dates = pd.date_range(df['기록_날짜'].min(), df['기록_날짜'].max()).date
-    disabled_dates = [date.strftime('%Y-%m-%d') for date in all_dates if date not in store_dates]
-
-    return disabled_dates, None
+    # 매장에 기록이 없는 날짜는 시작 시와 데이터 갱신 시 미리 계산한 인덱스에서 조회
+    return calendar_index.disabled_days(selected_store), None
 
 # 선택한 날짜의 근무 시간표 출력 콜백
 @dash.callback(
@@ -240,6 +310,12 @@ def update_schedule(selected_date, selected_store):
         return go.Figure()
 
     selected_date = pd.to_datetime(selected_date).date()
+    df = get_data()
+    key = make_key(df.attrs.get('source_hash'), selected_store, selected_date.isoformat())
+    return figure_cache.get_or_create(key, lambda: create_schedule_figure(df, selected_date, selected_store))
+
+# 선택한 매장/날짜의 근무 시간표 Figure 생성
+def create_schedule_figure(df, selected_date, selected_store):
     filtered_df = df[
         (df['기록_날짜'].dt.date == selected_date) & 
         (df['매장_ID'] == selected_store) & 
@@ -249,53 +325,29 @@ def update_schedule(selected_date, selected_store):
     if filtered_df.empty:
         return go.Figure()
 
-    # 근무 시간 데이터
-    employee_ids = filtered_df['직원_ID'].unique()
-    colors = ['#%06x' % np.random.randint(0, 0xFFFFFF) for _ in range(len(employee_ids))]
+    # 근무 시간 데이터 (등장 순서 유지, 직원 코드별 고정 팔레트 색상)
+    employee_categories = filtered_df['직원_ID'].cat.categories
+    employee_codes, palette_codes = pd.factorize(filtered_df['직원_ID'].cat.codes)
+    employee_ids = [str(emp_id) for emp_id in employee_categories[palette_codes]]
+    rgb = employee_palette(len(employee_categories))[palette_codes]
 
     # 직원별 색상 매핑
-    employee_color_map = dict(zip(employee_ids, colors))
-
-    # 시간대별 근무 직원 정보 저장
-    time_slots_am = [[] for _ in range(12)]
-    time_slots_pm = [[] for _ in range(12)]
-
-    for emp_id in employee_ids:
-        emp_data = filtered_df[filtered_df['직원_ID'] == emp_id]
-        for _, row in emp_data.iterrows():
-            start_hour = int(row['근무_시작'].split(':')[0])
-            end_hour = int(row['근무_종료'].split(':')[0])
-            for hour in range(start_hour, end_hour):
-                hour_mod = hour % 24
-                if hour_mod < 12:
-                    time_slots_am[hour_mod].append(emp_id)
-                else:
-                    time_slots_pm[hour_mod - 12].append(emp_id)
-
-    # 혼합 색상 및 텍스트 레이블 적용
-    slot_colors_am = ['white'] * 12
-    slot_colors_pm = ['white'] * 12
-    text_labels_am = [''] * 12
-    text_labels_pm = [''] * 12
-
-    for i in range(12):
-        # 오전 시간대 텍스트 설정
-        if len(time_slots_am[i]) == 1:
-            slot_colors_am[i] = employee_color_map[time_slots_am[i][0]]
-            text_labels_am[i] = f'{i}시 - ' + ', '.join(time_slots_am[i])
-        elif len(time_slots_am[i]) > 1:
-            mixed_color = mix_multiple_colors([employee_color_map[emp_id] for emp_id in time_slots_am[i]])
-            slot_colors_am[i] = mixed_color
-            text_labels_am[i] = f'{i}시 - ' + ', '.join(time_slots_am[i])
-
-        # 오후 시간대 텍스트 설정
-        if len(time_slots_pm[i]) == 1:
-            slot_colors_pm[i] = employee_color_map[time_slots_pm[i][0]]
-            text_labels_pm[i] = f'{i + 12}시 - ' + ', '.join(time_slots_pm[i])
-        elif len(time_slots_pm[i]) > 1:
-            mixed_color = mix_multiple_colors([employee_color_map[emp_id] for emp_id in time_slots_pm[i]])
-            slot_colors_pm[i] = mixed_color
-            text_labels_pm[i] = f'{i + 12}시 - ' + ', '.join(time_slots_pm[i])
+    employee_color_map = dict(zip(employee_ids, to_hex(rgb)))
+
+    # 직원 × 24시간 근무 행렬 (야간 근무는 자정을 넘겨 이어짐)
+    occupancy = employee_occupancy(
+        employee_codes,
+        filtered_df['근무_시작_분'].to_numpy(),
+        filtered_df['근무_종료_분'].to_numpy(),
+        len(employee_ids)
+    )
+
+    # 시간대별 혼합 색상 및 텍스트 레이블 (근무자가 없으면 흰색)
+    counts, mixed = slot_colors(occupancy, rgb)
+    slot_hex = [color if count else 'white' for color, count in zip(to_hex(mixed), counts)]
+    labels = slot_labels(occupancy, employee_ids)
+    slot_colors_am, slot_colors_pm = slot_hex[:12], slot_hex[12:]
+    text_labels_am, text_labels_pm = labels[:12], labels[12:]
 
     # Plotly 파이 차트 생성
     fig = go.Figure()
@@ -361,3 +413,38 @@ def update_schedule(selected_date, selected_store):
     )
 
     return fig
+
+# 매장 / 월 선택 시 일자 × 시간대 근무 인원 히트맵 콜백
+# 미리 계산한 (매장, 날짜, 시간) 큐브에서 해당 매장의 한 달 구간만 잘라 사용
+@dash.callback(
+    Output('coverage-heatmap', 'figure'),
+    [Input('store-selector', 'value'),
+     Input('coverage-month', 'value')]
+)
+def update_coverage_heatmap(selected_store, selected_month):
+    if not selected_store or not selected_month:
+        return go.Figure()
+
+    month_start = pd.Period(selected_month, 'M').start_time
+    month_end = month_start + pd.offsets.MonthBegin(1)
+    dates, counts = get_coverage().period(selected_store, month_start.date(), month_end.date())
+
+    fig = go.Figure(go.Heatmap(
+        z=np.asarray(counts),
+        x=[f'{hour}시' for hour in range(HOURS)],
+        y=np.datetime_as_string(dates, unit='D'),
+        colorscale='Blues',
+        zmin=0,
+        colorbar=dict(title='근무 인원'),
+        hovertemplate='%{y} %{x}<br>근무 인원: %{z}명<extra></extra>'
+    ))
+    fig.update_layout(
+        title=f'{selected_month} {selected_store} 시간대별 근무 인원',
+        xaxis=dict(title='시간', side='top'),
+        yaxis=dict(title='날짜', autorange='reversed', type='category'),
+        margin=dict(l=50, r=50, t=120, b=50),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(size=14, family='Arial', color='#000000')
+    )
+    return fig
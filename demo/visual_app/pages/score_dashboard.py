@@ -1,34 +1,22 @@
+import threading
+import time
+from collections import OrderedDict
 import dash
 from dash import dcc, html, Input, Output
 import dash_bootstrap_components as dbc
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from data_processing import load_data
+from data_processing import aggregate, aggregates, data_store, get_aggregate, get_data, get_unique_values
+from figure_cache import FigureCache, make_key
+from scatter_render import RASTER_THRESHOLD, SCATTERGL_THRESHOLD, density_trace, marker_trace, render_mode, report_render
+from trendline import SCATTER_MAX_POINTS, binned_lowess, density_sample, ols_trendline
 
 # 페이지 등록
 dash.register_page(__name__, path="/score_dashboard", name="Score Dashboard")
 
-# 데이터 불러오기 및 전처리
-df = load_data()  # 데이터 불러오기 및 기본 전처리 함수 호출
-df['근무상태'] = df['근무_여부'].apply(lambda x: 
-    '근무' if x == '근무' else 
-    '휴식중' if x == '휴식중' else 
-    '대기중' if x == '대기중' else 
-    'NONE'
-)
-
-# 피드백 점수 그룹화
-df['피드백_점수_그룹'] = pd.cut(
-    df['피드백_점수'],
-    bins=[-1.0, -0.6, -0.2, 0.2, 0.6, 1.0],
-    labels=['강하게 부정적', '부정적', '중립적', '긍정적', '강하게 긍정적'],
-    right=False,
-    include_lowest=True
-)
-
-# 파견 횟수를 그룹화
-df['파견횟수_그룹'] = (df['파견횟수'] // 5) * 5
+# 근무상태, 피드백_점수_그룹, 파견횟수_그룹 컬럼은 data_processing.preprocess_data에서 생성됨
 
 #  카드 스타일 정의
 FILTER_CARD_STYLE = {
@@ -56,159 +44,318 @@ COLOR_MAP = {
 }
 
 # 페이지 레이아웃 정의
-layout = dbc.Container(
-    [
-        # 필터 섹션 추가
-        dbc.Row(
-            dbc.Col(
-                dbc.Card(
-                    dbc.CardBody(
-                        [
-                            dbc.Row(
-                                [
-                                    dbc.Col(
-                                        [
-                                            html.Label("매장 카테고리", style={'font-weight': 'bold'}),  
-                                            dcc.Dropdown(
-                                                options=[
-                                                    {'label': cat, 'value': cat} for cat in sorted(df['매장_카테고리'].dropna().unique())
-                                                ],
-                                                value=None,
-                                                multi=True,
-                                                placeholder="카테고리 선택",
-                                                id='category-filter',
-                                                style={'font-weight': 'bold'}  
-                                            )
-                                        ],
-                                        md=4
-                                    ),
-                                    dbc.Col(
-                                        [
-                                            html.Label("연도", style={'font-weight': 'bold'}),  
-                                            dcc.Dropdown(
-                                                options=[
-                                                    {'label': year, 'value': year} for year in sorted(df['연도'].unique())
-                                                ],
-                                                value=sorted(df['연도'].unique()),
-                                                multi=True,
-                                                placeholder="연도 선택",
-                                                id='year-filter',
-                                                style={'font-weight': 'bold'}  
-                                            )
-                                        ],
-                                        md=4
-                                    ),
-                                    dbc.Col(
-                                        [
-                                            html.Label("월", style={'font-weight': 'bold'}),  
-                                            dcc.Dropdown(
-                                                options=[
-                                                    {'label': month, 'value': month} for month in range(1, 13)
-                                                ],
-                                                value=sorted(df['월'].unique()),
-                                                multi=True,
-                                                placeholder="월 선택",
-                                                id='month-filter',
-                                                style={'font-weight': 'bold'}  
-                                            )
-                                        ],
-                                        md=4
-                                    ),
-                                ]
-                            )
-                        ]
-                    ),
-                    style=FILTER_CARD_STYLE
-                ),
-                width=12,
-                className="mb-4"
-            )
-        ),
-        
-        # 그래프 1행 (피드백 vs 판매량, 파견 vs 판매량, 근무 상태 추세)
-        dbc.Row(
-            [
+def layout(**kwargs):
+    return dbc.Container(
+        [
+            # 필터 섹션 추가
+            dbc.Row(
                 dbc.Col(
                     dbc.Card(
                         dbc.CardBody(
-                            dcc.Graph(id='feedback-vs-sales', config={'displayModeBar': False})
+                            [
+                                dbc.Row(
+                                    [
+                                        dbc.Col(
+                                            [
+                                                html.Label("매장 카테고리", style={'font-weight': 'bold'}),  
+                                                dcc.Dropdown(
+                                                    options=[
+                                                        {'label': cat, 'value': cat} for cat in get_unique_values('매장_카테고리')
+                                                    ],
+                                                    value=None,
+                                                    multi=True,
+                                                    placeholder="카테고리 선택",
+                                                    id='category-filter',
+                                                    style={'font-weight': 'bold'}  
+                                                )
+                                            ],
+                                            md=4
+                                        ),
+                                        dbc.Col(
+                                            [
+                                                html.Label("연도", style={'font-weight': 'bold'}),  
+                                                dcc.Dropdown(
+                                                    options=[
+                                                        {'label': year, 'value': year} for year in get_unique_values('연도')
+                                                    ],
+                                                    value=get_unique_values('연도'),
+                                                    multi=True,
+                                                    placeholder="연도 선택",
+                                                    id='year-filter',
+                                                    style={'font-weight': 'bold'}  
+                                                )
+                                            ],
+                                            md=4
+                                        ),
+                                        dbc.Col(
+                                            [
+                                                html.Label("월", style={'font-weight': 'bold'}),  
+                                                dcc.Dropdown(
+                                                    options=[
+                                                        {'label': month, 'value': month} for month in range(1, 13)
+                                                    ],
+                                                    value=get_unique_values('월'),
+                                                    multi=True,
+                                                    placeholder="월 선택",
+                                                    id='month-filter',
+                                                    style={'font-weight': 'bold'}  
+                                                )
+                                            ],
+                                            md=4
+                                        ),
+                                    ]
+                                )
+                            ]
                         ),
-                        style=GRAPH_CARD_STYLE  
+                        style=FILTER_CARD_STYLE
                     ),
                     width=12,
-                    lg=4,
                     className="mb-4"
-                ),
-                dbc.Col(
-                    dbc.Card(
-                        dbc.CardBody(
-                            dcc.Graph(id='dispatch-vs-sales', config={'displayModeBar': False})
+                )
+            ),
+            
+            # 그래프 1행 (피드백 vs 판매량, 파견 vs 판매량, 근무 상태 추세)
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody(
+                                dcc.Graph(id='feedback-vs-sales', config={'displayModeBar': False})
+                            ),
+                            style=GRAPH_CARD_STYLE  
                         ),
-                        style=GRAPH_CARD_STYLE  
+                        width=12,
+                        lg=4,
+                        className="mb-4"
                     ),
-                    width=12,
-                    lg=4,
-                    className="mb-4"
-                ),
-                dbc.Col(
-                    dbc.Card(
-                        dbc.CardBody(
-                            dcc.Graph(id='work-status-trend', config={'displayModeBar': False})
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody(
+                                dcc.Graph(id='dispatch-vs-sales', config={'displayModeBar': False})
+                            ),
+                            style=GRAPH_CARD_STYLE  
                         ),
-                        style=GRAPH_CARD_STYLE  
+                        width=12,
+                        lg=4,
+                        className="mb-4"
                     ),
-                    width=12,
-                    lg=4,
-                    className="mb-4"
-                ),
-            ],
-            className="mb-4"
-        ),
-        
-        # 그래프 2행 (근무 상태 이동 평균, 피드백-파견 히트맵)
-        dbc.Row(
-            [
-                dbc.Col(
-                    dbc.Card(
-                        dbc.CardBody(
-                            dcc.Graph(id='work-status-moving-average', style={'height': '500px'}, config={'displayModeBar': False})
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody(
+                                dcc.Graph(id='work-status-trend', config={'displayModeBar': False})
+                            ),
+                            style=GRAPH_CARD_STYLE  
                         ),
-                        style=GRAPH_CARD_STYLE  
+                        width=12,
+                        lg=4,
+                        className="mb-4"
                     ),
-                    width=12,
-                    lg=6,
-                    className="mb-4"
-                ),
-                dbc.Col(
-                    dbc.Card(
-                        dbc.CardBody(
-                            dcc.Graph(id='feedback-dispatch-heatmap', style={'height': '500px'}, config={'displayModeBar': False})
+                ],
+                className="mb-4"
+            ),
+            
+            # 그래프 2행 (근무 상태 이동 평균, 피드백-파견 히트맵)
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody(
+                                dcc.Graph(id='work-status-moving-average', style={'height': '500px'}, config={'displayModeBar': False})
+                            ),
+                            style=GRAPH_CARD_STYLE  
                         ),
-                        style=GRAPH_CARD_STYLE  
+                        width=12,
+                        lg=6,
+                        className="mb-4"
                     ),
-                    width=12,
-                    lg=6,
-                    className="mb-4"
-                ),
-            ],
-            className="mb-4"
-        ),
-    ],
-    fluid=True,
-    style={'background-color': '#E0F7FA', 'padding': '20px'}  # 전체 배경색을 연한 청록색으로 설정
-)
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody(
+                                dcc.Graph(id='feedback-dispatch-heatmap', style={'height': '500px'}, config={'displayModeBar': False})
+                            ),
+                            style=GRAPH_CARD_STYLE  
+                        ),
+                        width=12,
+                        lg=6,
+                        className="mb-4"
+                    ),
+                ],
+                className="mb-4"
+            ),
+        ],
+        fluid=True,
+        style={'background-color': '#E0F7FA', 'padding': '20px'}  # 전체 배경색을 연한 청록색으로 설정
+    )
 
 
+# 필터 컬럼별 값 -> 행 마스크 (데이터 세대별로 한 번만 계산)
+FILTER_COLUMNS = ['매장_카테고리', '연도', '월']
+
+@aggregate('score.filter_masks')
+def build_filter_masks(df):
+    masks = {}
+    for column in FILTER_COLUMNS:
+        codes, values = pd.factorize(df[column])
+        masks[column] = {value: codes == i for i, value in enumerate(values)}
+    return masks
+
+# 필터 조합별 행 위치 캐시
+# 여러 그래프 콜백이 같은 필터로 동시에 호출되므로, 마스크 계산은 조합당 한 번만 하고 결과를 공유
+# 데이터프레임 사본 대신 행 위치 배열만 보관 (모든 행이 선택되면 None으로 저장하고 스냅샷을 그대로 사용)
+# 데이터가 다시 로드되면 캐시를 비워 이전 세대의 항목이 남지 않게 함
+FILTER_CACHE_SIZE = 16
+filter_cache = OrderedDict()
+filter_cache_lock = threading.Lock()
+
+def clear_filter_cache(*_):
+    with filter_cache_lock:
+        filter_cache.clear()
+
+data_store.add_reload_listener(clear_filter_cache)
+
+def combine_masks(masks, selected_values, n_rows):
+    mask = np.zeros(n_rows, dtype=bool)
+    for value in selected_values:
+        if value in masks:
+            mask |= masks[value]
+    return mask
+
+# 추세선 그래프 캐시 (데이터 지문 + 그래프 이름 + 필터 조합 기준)
+figure_cache = FigureCache('score_dashboard')
+
+# 렌더링 설정이 바뀌면 (환경 변수) 디스크에 캐시된 그래프를 다시 만들도록 키에 포함
+RENDER_SETTINGS = (SCATTERGL_THRESHOLD, RASTER_THRESHOLD, SCATTER_MAX_POINTS)
+
+# fingerprint는 그래프를 만들 데이터와 같은 스냅샷에서 가져와야 함 (filter_snapshot 참고)
+def filter_key(fingerprint, name, selected_categories, selected_years, selected_months):
+    return make_key(
+        fingerprint, name, RENDER_SETTINGS,
+        frozenset(selected_categories or ()), frozenset(selected_years or ()), frozenset(selected_months or ())
+    )
+
 # 데이터 필터링 함수 정의
 def filter_data(selected_categories, selected_years, selected_months):
-    filtered_df = df.copy()
-    if selected_categories:
-        filtered_df = filtered_df[filtered_df['매장_카테고리'].isin(selected_categories)]
-    if selected_years:
-        filtered_df = filtered_df[filtered_df['연도'].isin(selected_years)]
-    if selected_months:
-        filtered_df = filtered_df[filtered_df['월'].isin(selected_months)]
-    return filtered_df
+    return filter_snapshot(selected_categories, selected_years, selected_months)[0]
+
+# (필터링한 데이터, 원본 데이터 지문) 반환
+# 두 값을 한 번의 스냅샷에서 가져오므로, 중간에 데이터가 다시 로드되어도 다른 세대의 지문과 섞이지 않음
+def filter_snapshot(selected_categories, selected_years, selected_months):
+    data, masks, generation = aggregates.snapshot('score.filter_masks')
+    fingerprint = data.attrs.get('source_hash')
+    selections = [selected_categories, selected_years, selected_months]
+    key = (generation,) + tuple(frozenset(values or ()) for values in selections)
+    with filter_cache_lock:
+        cached = key in filter_cache
+        if cached:
+            filter_cache.move_to_end(key)
+            rows = filter_cache[key]
+
+    if not cached:
+        mask = None
+        for column, values in zip(FILTER_COLUMNS, selections):
+            if values:
+                column_mask = combine_masks(masks[column], values, len(data))
+                mask = column_mask if mask is None else mask & column_mask
+        rows = None if mask is None or mask.all() else np.flatnonzero(mask)
+        with filter_cache_lock:
+            filter_cache[key] = rows
+            filter_cache.move_to_end(key)
+            while len(filter_cache) > FILTER_CACHE_SIZE:
+                filter_cache.popitem(last=False)
+
+    filtered_df = data if rows is None else data.take(rows)
+    return filtered_df, fingerprint
+
+# 건수 집계용 분할표 (데이터 세대별로 한 번만 계산)
+# 축: (매장 카테고리, 연도, 월, 근무상태, 피드백 점수 그룹, 파견횟수 그룹), 각 축의 마지막 칸은 결측값
+# 필터 조합별 건수 그래프는 원본 행 대신 이 배열의 축별 선택/합계로 계산되어 행 수와 무관
+COUNT_AXES = ['매장_카테고리', '연도', '월', '근무상태', '피드백_점수_그룹', '파견횟수_그룹']
+
+@aggregate('score.count_tensor')
+def build_count_tensor(df):
+    labels, codes = [], []
+    for column in COUNT_AXES:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            axis_labels = list(values.cat.categories)
+            axis_codes = values.cat.codes.to_numpy()
+        else:
+            axis_codes, uniques = pd.factorize(values, sort=True)
+            axis_labels = list(uniques)
+        labels.append(axis_labels)
+        codes.append(np.where(axis_codes < 0, len(axis_labels), axis_codes).astype(np.int64))
+    shape = tuple(len(axis_labels) + 1 for axis_labels in labels)
+    counts = np.bincount(np.ravel_multi_index(codes, shape), minlength=int(np.prod(shape)))
+    return labels, counts.reshape(shape).astype(np.int32)
+
+# 필터 조건에 맞는 칸만 남기고 keep 이외의 축을 합산한 건수 배열
+# 필터를 적용한 축은 결측 칸을 제외하고 (isin과 동일), 남긴 축(keep)도 결측 칸은 제외 (groupby와 동일)
+# 반환값: (남긴 축별 라벨 목록, 건수 배열)
+def count_table(selected_categories, selected_years, selected_months, keep):
+    labels, counts = get_aggregate('score.count_tensor')
+    filters = dict(zip(COUNT_AXES, [selected_categories, selected_years, selected_months]))
+    axes = [COUNT_AXES.index(column) for column in keep]
+    index = []
+    for axis, column in enumerate(COUNT_AXES):
+        if filters.get(column):
+            index.append(np.flatnonzero(np.isin(labels[axis], filters[column])))
+        elif axis in axes:
+            index.append(np.arange(len(labels[axis])))
+        else:
+            index.append(np.arange(len(labels[axis]) + 1))
+    counts = counts[np.ix_(*index)].sum(axis=tuple(i for i in range(len(COUNT_AXES)) if i not in axes))
+    counts = counts.transpose([sorted(axes).index(axis) for axis in axes])  # keep 순서로 축 정렬
+    return [[labels[i][j] for j in index[i]] for i in axes], counts
+
+# 산점도 + 직선(OLS) / 곡선(LOWESS) 추세선 그래프 생성
+# 추세선은 전체 데이터로 계산하고, 산점도는 점 수에 따라 SVG / WebGL(밀도 보존 표본) / 밀도 이미지로 표시
+def create_trend_figure(x, y, title, x_label):
+    started = time.perf_counter()
+    x = x.to_numpy(dtype=float)
+    y = y.to_numpy(dtype=float)
+    mode = render_mode(len(x))
+    _, _, ols_x, ols_y = ols_trendline(x, y)
+    lowess_x, lowess_y = binned_lowess(x, y)
+
+    fig = go.Figure(layout=dict(template='plotly_white'))
+
+    # 산점도 추가
+    if mode == 'raster':
+        fig.add_trace(density_trace(x, y, hover_label='건수'))
+    else:
+        sample = density_sample(x, y)
+        fig.add_trace(marker_trace(
+            x[sample], y[sample], mode,
+            marker=dict(color='#636EFA'),
+            hovertemplate=f'{x_label}=%{{x}}<br>판매량=%{{y}}<extra></extra>',
+            showlegend=False
+        ))
+
+    # 직선 추세선 추가
+    fig.add_trace(go.Scatter(
+        x=ols_x, y=ols_y, mode='lines',
+        line=dict(color='#FF6961', dash='dash', width=2), name='직선 추세선'
+    ))
+
+    # 곡선 추세선 추가
+    fig.add_trace(go.Scatter(
+        x=lowess_x, y=lowess_y, mode='lines',
+        line=dict(color='#77DD77', width=3), name='곡선 추세선'
+    ))
+
+    # 레이아웃 설정
+    fig.update_layout(
+        title={'text': title, 'x': 0.5, 'xanchor': 'center'},
+        xaxis_title=x_label,
+        yaxis_title='판매량',
+        font=dict(size=14, family='Arial', color='#000000', weight='bold'),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        showlegend=True,
+        legend=dict(title='추세선', orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1)
+    )
+    report_render(title, mode, len(x), fig, started)
+    return fig
 
 # 피드백 점수별 판매량 추세 그래프 콜백
 @dash.callback(
@@ -220,66 +367,23 @@ def filter_data(selected_categories, selected_years, selected_months):
     ]
 )
 def update_feedback_vs_sales(selected_categories, selected_years, selected_months):
-    filtered_df = filter_data(selected_categories, selected_years, selected_months)
-    
+    filtered_df, fingerprint = filter_snapshot(selected_categories, selected_years, selected_months)
+    key = filter_key(fingerprint, 'update_feedback_vs_sales', selected_categories, selected_years, selected_months)
+    return figure_cache.get_or_create(key, lambda: create_feedback_vs_sales(filtered_df))
+
+def create_feedback_vs_sales(filtered_df):
     # 데이터 필터링 및 정제
     cat_data = filtered_df[filtered_df['매장_카테고리'].notna()]
-    cat_data = cat_data[['피드백_점수', '판매량']].dropna()  
-    cat_data['피드백_점수'] = pd.to_numeric(cat_data['피드백_점수'], errors='coerce')  
-    cat_data['판매량'] = pd.to_numeric(cat_data['판매량'], errors='coerce')  
-    cat_data = cat_data.dropna()  
+    cat_data = cat_data[['피드백_점수', '판매량']].dropna()
+    cat_data['피드백_점수'] = pd.to_numeric(cat_data['피드백_점수'], errors='coerce')
+    cat_data['판매량'] = pd.to_numeric(cat_data['판매량'], errors='coerce')
+    cat_data = cat_data.dropna()
 
     # 데이터프레임이 비어있을 경우 빈 Figure 반환
     if cat_data.empty:
         return go.Figure()
 
-    # 직선 추세선 (OLS)
-    fig_ols = px.scatter(
-        cat_data, 
-        x='피드백_점수', 
-        y='판매량',
-        trendline='ols',
-        title='피드백 점수별 판매량 추세',
-        labels={'피드백_점수': '피드백 점수', '판매량': '판매량'},
-        template='plotly_white'
-    )
-
-    # 곡선 추세선 (LOWESS)
-    fig_lowess = px.scatter(
-        cat_data, 
-        x='피드백_점수', 
-        y='판매량',
-        trendline='lowess',
-        title='피드백 점수별 판매량 추세',
-        labels={'피드백_점수': '피드백 점수', '판매량': '판매량'},
-        template='plotly_white'
-    )
-
-    # 새로운 Figure 생성
-    fig = go.Figure()
-
-    # 산점도 추가
-    fig.add_traces([trace for trace in fig_ols.data if trace.mode == 'markers'])  
-
-    # 직선 추세선 추가
-    fig.add_traces([trace for trace in fig_ols.data if trace.mode == 'lines'])
-    fig.data[-1].update(line=dict(color='#FF6961', dash='dash', width=2), name='직선 추세선')  
-
-    # 곡선 추세선 추가
-    fig.add_traces([trace for trace in fig_lowess.data if trace.mode == 'lines'])
-    fig.data[-1].update(line=dict(color='#77DD77', width=3), name='곡선 추세선')  
-
-    # 레이아웃 설정
-    fig.update_layout(
-        title={'text': '피드백 점수별 판매량 추세', 'x': 0.5, 'xanchor': 'center'},
-        font=dict(size=14, family='Arial', color='#000000', weight='bold'),  
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        showlegend=True,
-        legend=dict(title='추세선', orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1)
-    )
-
-    return fig
+    return create_trend_figure(cat_data['피드백_점수'], cat_data['판매량'], '피드백 점수별 판매량 추세', '피드백 점수')
 
 # 파견횟수별 판매량 추세 그래프 콜백
 @dash.callback(
@@ -291,8 +395,11 @@ def update_feedback_vs_sales(selected_categories, selected_years, selected_month
     ]
 )
 def update_dispatch_vs_sales(selected_categories, selected_years, selected_months):
-    filtered_df = filter_data(selected_categories, selected_years, selected_months)
-    
+    filtered_df, fingerprint = filter_snapshot(selected_categories, selected_years, selected_months)
+    key = filter_key(fingerprint, 'update_dispatch_vs_sales', selected_categories, selected_years, selected_months)
+    return figure_cache.get_or_create(key, lambda: create_dispatch_vs_sales(filtered_df))
+
+def create_dispatch_vs_sales(filtered_df):
     # 데이터 필터링 및 정제
     cat_data = filtered_df[filtered_df['매장_카테고리'].notna()]
     cat_data = cat_data[['파견횟수', '판매량']].dropna()
@@ -304,53 +411,7 @@ def update_dispatch_vs_sales(selected_categories, selected_years, selected_month
     if cat_data.empty:
         return go.Figure()
 
-    # 직선 추세선 (OLS)
-    fig_ols = px.scatter(
-        cat_data, 
-        x='파견횟수', 
-        y='판매량', 
-        trendline='ols',
-        title='파견횟수별 판매량 추세',
-        labels={'파견횟수': '파견횟수', '판매량': '판매량'},
-        template='plotly_white'
-    )
-
-    # 곡선 추세선 (LOWESS)
-    fig_lowess = px.scatter(
-        cat_data, 
-        x='파견횟수', 
-        y='판매량', 
-        trendline='lowess',
-        title='파견횟수별 판매량 추세',
-        labels={'파견횟수': '파견횟수', '판매량': '판매량'},
-        template='plotly_white'
-    )
-
-    # 새로운 Figure 생성
-    fig = go.Figure()
-
-    # 산점도 추가
-    fig.add_traces([trace for trace in fig_ols.data if trace.mode == 'markers'])
-
-    # 직선 추세선 추가
-    fig.add_traces([trace for trace in fig_ols.data if trace.mode == 'lines'])
-    fig.data[-1].update(line=dict(color='#FF6961', dash='dash', width=2), name='직선 추세선')  
-
-    # 곡선 추세선 추가
-    fig.add_traces([trace for trace in fig_lowess.data if trace.mode == 'lines'])
-    fig.data[-1].update(line=dict(color='#77DD77', width=3), name='곡선 추세선')  
-
-    # 레이아웃 설정
-    fig.update_layout(
-        title={'text': '파견횟수별 판매량 추세', 'x': 0.5, 'xanchor': 'center'},
-        font=dict(size=14, family='Arial', color='#000000', weight='bold'),  
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        showlegend=True,
-        legend=dict(title='추세선', orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1)
-    )
-
-    return fig
+    return create_trend_figure(cat_data['파견횟수'], cat_data['판매량'], '파견횟수별 판매량 추세', '파견횟수')
 
 # 근무 상태별 인원 변화 시각화 그래프 콜백
 @dash.callback(
@@ -362,12 +423,16 @@ def update_dispatch_vs_sales(selected_categories, selected_years, selected_month
     ]
 )
 def work_status_trend(selected_categories, selected_years, selected_months):
-    filtered_df = filter_data(selected_categories, selected_years, selected_months)
-    
-    filtered_df['연도_월'] = filtered_df['연도'].astype(str) + '-' + filtered_df['월'].astype(str).str.zfill(2)  # 연도-월 형식으로 변환
+    # 분할표에서 (연도, 월, 근무상태)별 건수 계산
+    (years, months, statuses), counts = count_table(selected_categories, selected_years, selected_months, ['연도', '월', '근무상태'])
 
-    # 월별로 근무 상태별 일수를 집계
-    monthly_counts = filtered_df.groupby(['연도_월', '근무상태']).size().reset_index(name='일수')
+    # 월별로 근무 상태별 일수 (건수가 있는 조합만, 연도-월 순서)
+    year_index, month_index, status_index = np.nonzero(counts)
+    monthly_counts = pd.DataFrame({
+        '연도_월': [f"{years[y]}-{months[m]:02d}" for y, m in zip(year_index, month_index)],
+        '근무상태': pd.Categorical([statuses[i] for i in status_index], categories=statuses),
+        '일수': counts[year_index, month_index, status_index]
+    })
 
     # 누적 막대 그래프 생성
     fig = px.bar(
@@ -393,6 +458,120 @@ def work_status_trend(selected_categories, selected_years, selected_months):
 
     return fig
 
+# 근무 상태별 일별 인원 집계표 (이동 평균 그래프용)
+# 직원 한 명이 같은 날 여러 카테고리 매장에서 근무할 수 있으므로 카테고리별 인원을 단순 합산하면 중복 집계됨
+# -> (날짜, 근무상태, 직원)마다 근무한 카테고리 집합을 비트 패턴으로 만들고, 패턴별 인원 수를 저장
+#    (비트: 카테고리 순서대로, 마지막 비트는 카테고리 없음)
+# 카테고리 필터는 선택한 비트를 포함하는 패턴의 합으로 계산되어 행 단위 groupby가 필요 없음
+# 데이터가 다시 로드되면 날짜별 지문을 비교하여 바뀌거나 추가된 날짜만 다시 집계
+# 패턴 수가 카테고리 수에 따라 2배씩 늘어나므로, 카테고리가 많으면 집계표 없이 필터링한 행에서 직접 계산
+DAILY_STATUS_COLUMNS = ['기록_날짜', '근무상태', '직원_ID', '매장_카테고리']
+MOVING_AVERAGE_WINDOW = 7
+DAILY_STATUS_MAX_CATEGORIES = 10  # 패턴 수 2**(10+1) = 2048
+
+class DailyStatusTable:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None  # (카테고리, 근무상태, 날짜 배열, 날짜별 지문, 인원 수 배열[날짜, 근무상태, 패턴])
+
+    def rebuild(self, data):
+        if data is None or data.empty:
+            return
+        categories = list(data['매장_카테고리'].cat.categories)
+        if len(categories) > DAILY_STATUS_MAX_CATEGORIES:
+            with self._lock:
+                self._state = None
+            print(f"Daily status table disabled: {len(categories)} categories (max {DAILY_STATUS_MAX_CATEGORIES})")
+            return
+        statuses = list(data['근무상태'].cat.categories)
+        dates, date_index = np.unique(data['기록_날짜'].to_numpy(dtype='datetime64[D]'), return_inverse=True)
+
+        # 날짜별 지문: 행 해시의 날짜별 합 (행 순서와 무관)
+        row_hashes = pd.util.hash_pandas_object(data[DAILY_STATUS_COLUMNS], index=False).to_numpy()
+        fingerprints = np.zeros(len(dates), dtype=np.uint64)
+        np.add.at(fingerprints, date_index, row_hashes)
+
+        counts = np.zeros((len(dates), len(statuses), 1 << (len(categories) + 1)), dtype=np.int32)
+        changed = np.ones(len(dates), dtype=bool)
+        with self._lock:
+            previous = self._state
+        if previous is not None and previous[0] == categories and previous[1] == statuses and len(previous[2]):
+            # 카테고리/근무상태 구성이 같을 때만 지문이 같은 날짜의 집계를 재사용
+            _, _, old_dates, old_fingerprints, old_counts = previous
+            position = np.minimum(np.searchsorted(old_dates, dates), len(old_dates) - 1)
+            same = (old_dates[position] == dates) & (old_fingerprints[position] == fingerprints)
+            counts[same] = old_counts[position[same]]
+            changed = ~same
+
+        rows = changed[date_index]
+        if rows.any():
+            self._count_patterns(counts, data[rows], date_index[rows], len(categories))
+        with self._lock:
+            self._state = (categories, statuses, dates, fingerprints, counts)
+        print(f"Daily status table: {changed.sum()} of {len(dates)} days recomputed")
+
+    @staticmethod
+    def _count_patterns(counts, rows, date_index, n_categories):
+        n_statuses = counts.shape[1]
+        status_codes = rows['근무상태'].cat.codes.to_numpy().astype(np.int64)
+        employee_codes = pd.factorize(rows['직원_ID'])[0].astype(np.int64)
+        category_codes = rows['매장_카테고리'].cat.codes.to_numpy().astype(np.int64)
+        bits = np.where(category_codes < 0, n_categories, category_codes)
+
+        valid = (status_codes >= 0) & (employee_codes >= 0)
+        n_employees = employee_codes.max() + 1 if valid.any() else 1
+        keys = (date_index[valid] * n_statuses + status_codes[valid]) * n_employees + employee_codes[valid]
+        # (날짜, 근무상태, 직원, 카테고리 비트) 중복 제거 후 직원별 비트 합 = 카테고리 패턴
+        pairs = np.unique(keys * (n_categories + 1) + bits[valid])
+        employees, inverse = np.unique(pairs // (n_categories + 1), return_inverse=True)
+        patterns = np.bincount(inverse, weights=1 << (pairs % (n_categories + 1))).astype(np.int64)
+        date_status = employees // n_employees
+        np.add.at(counts, (date_status // n_statuses, date_status % n_statuses, patterns), 1)
+
+    # 필터 조건별 근무 상태별 이동 평균
+    # 반환값: (날짜 배열, 근무상태 목록, 이동 평균 배열[날짜, 근무상태]) - 필터 결과에 기록이 있는 날짜/상태만 포함
+    # 집계표가 없으면 (카테고리가 너무 많거나 데이터가 없음) 필터링한 행에서 계산
+    def moving_average(self, selected_categories, selected_years, selected_months, window=MOVING_AVERAGE_WINDOW):
+        with self._lock:
+            state = self._state
+        if state is None:
+            return rows_moving_average(filter_data(selected_categories, selected_years, selected_months), window)
+        categories, statuses, dates, _, counts = state
+
+        patterns = np.arange(counts.shape[2])
+        if selected_categories:
+            selected_bits = sum(1 << categories.index(c) for c in selected_categories if c in categories)
+        else:
+            selected_bits = patterns[-1]  # 카테고리 없음 포함 전체
+        daily = counts[:, :, (patterns & selected_bits) > 0].sum(axis=2)
+
+        day_mask = daily.sum(axis=1) > 0
+        if selected_years:
+            day_mask &= np.isin(dates.astype('datetime64[Y]').astype(int) + 1970, selected_years)
+        if selected_months:
+            day_mask &= np.isin(dates.astype('datetime64[M]').astype(int) % 12 + 1, selected_months)
+        daily = daily[day_mask]
+        status_mask = daily.sum(axis=0) > 0
+        daily = daily[:, status_mask]
+
+        # 누적합 차이로 window일 합계 계산 (앞쪽 window-1일은 NaN, pandas rolling과 동일)
+        prefix = np.vstack([np.zeros((1, daily.shape[1])), np.cumsum(daily, axis=0)])
+        averages = np.full(daily.shape, np.nan)
+        if len(daily) >= window:
+            averages[window - 1:] = (prefix[window:] - prefix[:-window]) / window
+        return dates[day_mask], [s for s, keep in zip(statuses, status_mask) if keep], averages
+
+# 필터링한 행에서 날짜별 근무 상태별 직원 수의 이동 평균 계산 (집계표를 쓸 수 없을 때)
+def rows_moving_average(filtered_df, window=MOVING_AVERAGE_WINDOW):
+    daily_status_pivot = filtered_df.groupby(['기록_날짜', '근무상태'], observed=True).agg({'직원_ID': 'nunique'}).reset_index()
+    daily_status_pivot = daily_status_pivot.pivot(index='기록_날짜', columns='근무상태', values='직원_ID').fillna(0)
+    rolling_avg = daily_status_pivot.rolling(window=window).mean()
+    return rolling_avg.index.to_numpy(dtype='datetime64[D]'), list(rolling_avg.columns), rolling_avg.to_numpy(dtype=float)
+
+daily_status_table = DailyStatusTable()
+daily_status_table.rebuild(get_data())
+data_store.add_reload_listener(lambda data, generation: daily_status_table.rebuild(data))
+
 # 근무 상태별 인원 변화 (7일 이동 평균) 그래프 콜백
 @dash.callback(
     Output('work-status-moving-average', 'figure'),
@@ -403,36 +582,23 @@ def work_status_trend(selected_categories, selected_years, selected_months):
     ]
 )
 def update_work_status_moving_average(selected_categories, selected_years, selected_months):
-    filtered_df = filter_data(selected_categories, selected_years, selected_months)
-    
-    # 날짜별로 근무 상태별 직원 수 집계
-    daily_status_pivot = filtered_df.groupby(['기록_날짜', '근무상태']).agg({'직원_ID': 'nunique'}).reset_index()
-    daily_status_pivot = daily_status_pivot.pivot(index='기록_날짜', columns='근무상태', values='직원_ID').fillna(0)
-    rolling_avg = daily_status_pivot.rolling(window=7).mean().reset_index()
+    # 일별 집계표에서 이동 평균 계산 (원본 행 groupby 없음)
+    dates, statuses, averages = daily_status_table.moving_average(selected_categories, selected_years, selected_months)
+    dates = dates.astype('datetime64[ns]')
 
     # 선 그래프 생성
     fig = go.Figure()
 
     # 각 근무 상태별로 선 추가
-    for status in rolling_avg.columns[1:]:  # '기록_날짜' 제외
-        if status in COLOR_MAP:
-            fig.add_trace(go.Scatter(
-                x=rolling_avg['기록_날짜'],
-                y=rolling_avg[status],
-                mode='lines',
-                name=status,
-                line=dict(color=COLOR_MAP.get(status, '#BDBDBD')),
-                line_width=2
-            ))
-        else:
-            fig.add_trace(go.Scatter(
-                x=rolling_avg['기록_날짜'],
-                y=rolling_avg[status],
-                mode='lines',
-                name=status,
-                line=dict(color=COLOR_MAP.get('NONE', '#BDBDBD')),
-                line_width=2
-            ))
+    for i, status in enumerate(statuses):
+        fig.add_trace(go.Scatter(
+            x=dates,
+            y=averages[:, i],
+            mode='lines',
+            name=status,
+            line=dict(color=COLOR_MAP.get(status, COLOR_MAP['NONE'])),
+            line_width=2
+        ))
 
     # 레이아웃 설정
     fig.update_layout(
@@ -458,20 +624,18 @@ def update_work_status_moving_average(selected_categories, selected_years, selec
     ]
 )
 def update_feedback_dispatch_heatmap(selected_categories, selected_years, selected_months):
-    filtered_df = filter_data(selected_categories, selected_years, selected_months)
-    
-    # 피벗 테이블 생성 (빈 값 채우기)
-    heatmap_data = filtered_df.pivot_table(
-        index='피드백_점수_그룹',
-        columns='파견횟수_그룹',
-        values='기록_ID',
-        aggfunc='count',
-        fill_value=0
+    # 분할표에서 (피드백 점수 그룹, 파견횟수 그룹)별 건수 계산
+    (feedback_groups, dispatch_groups), counts = count_table(
+        selected_categories, selected_years, selected_months, ['피드백_점수_그룹', '파견횟수_그룹']
     )
 
     # 모든 피드백 그룹이 표시되도록 y축 라벨을 강제 설정
+    # x축은 필터 결과에 기록이 있는 파견 그룹 (피드백 점수가 없는 기록 포함, pivot_table과 동일)
     y_labels = ['강하게 부정적', '부정적', '중립적', '긍정적', '강하게 긍정적']
-    heatmap_data = heatmap_data.reindex(y_labels).fillna(0)
+    counts = counts[[feedback_groups.index(label) for label in y_labels]]
+    _, dispatch_counts = count_table(selected_categories, selected_years, selected_months, ['파견횟수_그룹'])
+    observed = dispatch_counts > 0
+    heatmap_data = pd.DataFrame(counts[:, observed], index=y_labels, columns=np.asarray(dispatch_groups)[observed])
 
     # 히트맵 생성
     fig = go.Figure(data=go.Heatmap(
@@ -0,0 +1,76 @@
+import argparse
+import os
+import time
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# 산점도 렌더링 방식 전환 기준 (점 수)
+# SVG: 점이 적을 때 그대로 표시 / WebGL(Scattergl): 많은 점 / 래스터: 서버에서 격자로 집계한 밀도 이미지
+SCATTERGL_THRESHOLD = int(os.environ.get('SCATTERGL_THRESHOLD', 1000))
+RASTER_THRESHOLD = int(os.environ.get('SCATTER_RASTER_THRESHOLD', 200000))
+RASTER_WIDTH = 200   # 밀도 이미지 가로 격자 수
+RASTER_HEIGHT = 150  # 밀도 이미지 세로 격자 수
+# 렌더링 방식별 응답 크기/시간 출력 여부 (SCATTER_RENDER_REPORT=1)
+# 출력할 때마다 Figure를 한 번 더 직렬화하므로 기본값은 끔
+RENDER_REPORT = os.environ.get('SCATTER_RENDER_REPORT', '0') == '1'
+
+# 점 수에 따른 렌더링 방식 ('svg', 'webgl', 'raster')
+def render_mode(n_points, gl_threshold=SCATTERGL_THRESHOLD, raster_threshold=RASTER_THRESHOLD):
+    if n_points > raster_threshold:
+        return 'raster'
+    if n_points > gl_threshold:
+        return 'webgl'
+    return 'svg'
+
+# 산점도 trace (SVG 또는 WebGL)
+def marker_trace(x, y, mode, **kwargs):
+    trace_type = go.Scattergl if mode == 'webgl' else go.Scatter
+    return trace_type(x=x, y=y, mode='markers', **kwargs)
+
+# 점들을 (RASTER_WIDTH × RASTER_HEIGHT) 격자로 집계한 밀도 이미지 trace
+# 응답 크기가 점 수와 무관하게 격자 수에 비례, 점이 없는 칸은 투명하게 표시
+def density_trace(x, y, width=RASTER_WIDTH, height=RASTER_HEIGHT, colorscale='Blues', hover_label='점 수'):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.isfinite(x) & np.isfinite(y)
+    counts, x_edges, y_edges = np.histogram2d(x[finite], y[finite], bins=[width, height])
+    z = np.where(counts > 0, counts, np.nan).T  # Heatmap은 z[행=y][열=x]
+    return go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=z,
+        colorscale=colorscale,
+        showscale=False,
+        hovertemplate=f'%{{x:.2f}}, %{{y:.2f}}<br>{hover_label}: %{{z}}<extra></extra>'
+    )
+
+# 렌더링 방식, 점 수, 생성 시간, 응답(JSON) 크기 출력
+def report_render(name, mode, n_points, fig, started):
+    if not RENDER_REPORT:
+        return
+    elapsed = time.perf_counter() - started
+    size = len(pio.to_json(fig, validate=False))
+    print(f"Rendered {name}: {n_points} points as {mode} in {elapsed * 1000:.1f} ms ({size / 1024:.1f} KB)")
+
+
+# 렌더링 방식별 Figure 생성 시간과 응답 크기 비교
+def benchmark(sizes):
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        x = rng.normal(size=n)
+        y = 2 * x + rng.normal(size=n)
+        for mode in ['svg', 'webgl', 'raster']:
+            start = time.perf_counter()
+            trace = density_trace(x, y) if mode == 'raster' else marker_trace(x, y, mode)
+            size = len(pio.to_json(go.Figure(trace), validate=False))
+            elapsed = time.perf_counter() - start
+            marker = '*' if render_mode(n) == mode else ' '
+            print(f"{marker} {n:>9} points  {mode:<6} {elapsed * 1000:8.1f} ms  {size / 1024:10.1f} KB")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="산점도 렌더링 방식별 응답 크기/시간 비교 (* = 자동 선택)")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000], help="비교할 점 수")
+    args = parser.parse_args()
+    benchmark(args.sizes)
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+from box_plot import box_summary, create_box_figure
+
+# 급여 그룹별 피드백 점수 (Box Plot 입력과 같은 형태)
+@pytest.fixture
+def feedback_groups():
+    return pd.DataFrame({
+        '연도': [2024] * 6 + [2025] * 3,
+        '급여_그룹': [200, 200, 200, 200, 300, 300, 200, 300, 300],
+        '피드백_점수': [3.0, 4.0, 5.0, 40.0, 2.0, 4.0, np.nan, np.nan, np.nan],
+    })
+
+def test_box_summary(feedback_groups):
+    summary, outliers = box_summary(feedback_groups, '급여_그룹', '피드백_점수')
+    assert summary['급여_그룹'].tolist() == [200, 300]
+    assert summary['median'].tolist() == [4.5, 3.0]
+    assert summary['upperfence'].tolist() == [5.0, 4.0]
+    assert outliers['피드백_점수'].tolist() == [40.0]
+
+# 선택한 연도에 데이터가 없거나, 피드백 점수가 모두 결측값인 경우 빈 그래프
+@pytest.mark.parametrize('year', [1999, 2025])
+def test_empty_selection(feedback_groups, year):
+    selected = feedback_groups[feedback_groups['연도'] == year]
+    summary, outliers = box_summary(selected, '급여_그룹', '피드백_점수')
+    assert summary.empty and outliers.empty
+    fig = create_box_figure(selected, '급여_그룹', '피드백_점수', '#000000')
+    assert len(fig.data) == 0
@@ -0,0 +1,123 @@
+import numpy as np
+
+# 추세선/산점도 설정
+LOWESS_FRAC = 2 / 3          # LOWESS 이웃 비율 (statsmodels / plotly express 기본값과 동일)
+LOWESS_GRID_SIZE = 200       # LOWESS 계산에 사용할 x 격자 수
+LOWESS_ITERATIONS = 3        # LOWESS 이상치 보정 반복 횟수 (statsmodels 기본값과 동일)
+SCATTER_MAX_POINTS = 20000   # 산점도(WebGL)에 표시할 최대 점 수
+SAMPLE_GRID_SIZE = 64        # 밀도 보존 표본 추출용 2차원 격자 크기 (축별 칸 수)
+
+# 최소제곱 직선 추세선 (닫힌 형태 해)
+# 반환값: (기울기, 절편, x 끝점 배열, 추세선 y 배열)
+def ols_trendline(x, y):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    x_mean, y_mean = x.mean(), y.mean()
+    variance = ((x - x_mean) ** 2).sum()
+    slope = ((x - x_mean) * (y - y_mean)).sum() / variance if variance > 0 else 0.0
+    intercept = y_mean - slope * x_mean
+    x_line = np.array([x.min(), x.max()])
+    return slope, intercept, x_line, intercept + slope * x_line
+
+# x 값을 격자 번호로 변환하고 격자별 평균 x를 계산
+# 고유한 x 값이 격자 수 이하이면 (예: 파견횟수) 값 그대로 묶음
+# 반환값: (점별 격자 번호, 격자 x 배열, 격자별 점 수)
+def bin_by_x(x, grid_size=LOWESS_GRID_SIZE):
+    values, inverse = np.unique(x, return_inverse=True)
+    if len(values) > grid_size:
+        edges = np.linspace(x.min(), x.max(), grid_size + 1)
+        inverse = np.clip(np.searchsorted(edges, x, side='right') - 1, 0, grid_size - 1)
+    counts = np.bincount(inverse)
+    occupied = counts > 0
+    # 빈 격자를 제외하고 번호를 다시 매김
+    remap = np.cumsum(occupied) - 1
+    centers = np.bincount(inverse, weights=x)[occupied] / counts[occupied]
+    return remap[inverse], centers, counts[occupied].astype(np.float64)
+
+# 격자점별 국소 가중 선형 회귀 (tricube 거리 가중치 × 격자 가중치)
+# 이웃 범위는 전체 점의 frac 비율을 포함하는 가장 가까운 격자까지 (최소 3개 격자)
+def local_linear(centers, means, counts, weights, frac):
+    distances = np.abs(centers[:, None] - centers[None, :])
+    order = np.argsort(distances, axis=1)
+    sorted_distances = np.take_along_axis(distances, order, axis=1)
+    covered = np.cumsum(counts[order], axis=1)
+    reach = np.minimum(np.maximum((covered < frac * counts.sum()).sum(axis=1), 2), len(centers) - 1)
+    bandwidth = sorted_distances[np.arange(len(centers)), reach]
+    bandwidth = np.where(bandwidth > 0, bandwidth * 1.000001, 1.0)
+
+    w = np.clip(1 - (distances / bandwidth[:, None]) ** 3, 0, None) ** 3 * weights[None, :]
+    w_sum = np.maximum(w.sum(axis=1), 1e-12)
+    x_bar = w @ centers / w_sum
+    y_bar = w @ means / w_sum
+    dx = centers[None, :] - x_bar[:, None]
+    s_xx = (w * dx ** 2).sum(axis=1)
+    s_xy = (w * dx * (means[None, :] - y_bar[:, None])).sum(axis=1)
+    slope = np.divide(s_xy, s_xx, out=np.zeros_like(s_xy), where=s_xx > 0)
+    return y_bar + slope * (centers - x_bar)
+
+# 격자 위에서 계산하는 LOWESS
+# 점들을 x 격자로 축약한 뒤 격자 단위로 회귀하므로 계산량이 점 수가 아닌 격자 수에 비례
+# statsmodels와 같이 잔차 기반 bisquare 가중치로 iterations회 재적합하여 이상치 영향을 줄임
+# 반환값: (격자 x 배열, 추세선 y 배열)
+def binned_lowess(x, y, frac=LOWESS_FRAC, grid_size=LOWESS_GRID_SIZE, iterations=LOWESS_ITERATIONS):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    bins, centers, counts = bin_by_x(x, grid_size)
+    robustness = np.ones(len(x))
+    fitted = None
+    for _ in range(iterations + 1):
+        weights = np.bincount(bins, weights=robustness, minlength=len(centers))
+        means = np.divide(np.bincount(bins, weights=robustness * y, minlength=len(centers)), weights,
+                          out=np.zeros(len(centers)), where=weights > 0)
+        if len(centers) < 3:
+            return centers, means
+        fitted = local_linear(centers, means, counts, weights, frac)
+
+        residuals = y - np.interp(x, centers, fitted)
+        scale = np.median(np.abs(residuals))
+        if scale == 0:
+            break
+        robustness = np.clip(1 - (residuals / (6 * scale)) ** 2, 0, None) ** 2
+    return centers, fitted
+
+# 밀도 보존 표본 추출: 2차원 격자 칸별로 점 수에 비례하여 추출 (점이 있는 칸은 최소 1개 유지)
+# 반환값: 선택된 점의 인덱스 배열 (원래 순서 유지)
+def density_sample(x, y, max_points=SCATTER_MAX_POINTS, grid_size=SAMPLE_GRID_SIZE, seed=0):
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    def cell_index(values):
+        span = values.max() - values.min()
+        if span == 0:
+            return np.zeros(len(values), dtype=np.int64)
+        return np.minimum(((values - values.min()) / span * grid_size).astype(np.int64), grid_size - 1)
+
+    cells = cell_index(x) * grid_size + cell_index(y)
+    counts = np.bincount(cells, minlength=grid_size * grid_size)
+
+    # 칸별 할당량: 점 수 × 비율 (최소 1개)
+    # 합계가 max_points 이하가 되는 가장 큰 비율을 이분 탐색으로 찾음
+    occupied = counts > 0
+    if occupied.sum() > max_points:
+        # 점이 있는 칸이 max_points보다 많으면 최소 1개 보장 없이 비례 추출
+        quota = np.floor(counts * (max_points / n))
+    else:
+        low, high = 0.0, max_points / n
+        for _ in range(30):
+            ratio = (low + high) / 2
+            if np.where(occupied, np.maximum(np.floor(counts * ratio), 1), 0).sum() <= max_points:
+                low = ratio
+            else:
+                high = ratio
+        quota = np.where(occupied, np.maximum(np.floor(counts * low), 1), 0)
+
+    # 무작위 순서로 섞은 뒤 칸별 순위가 할당량보다 작은 점만 선택
+    rng = np.random.default_rng(seed)
+    shuffled = rng.permutation(n)
+    order = shuffled[np.argsort(cells[shuffled], kind='stable')]
+    sorted_cells = cells[order]
+    rank = np.arange(n) - np.searchsorted(sorted_cells, sorted_cells)
+    return np.sort(order[rank < quota[sorted_cells]])
@@ -0,0 +1,118 @@
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from benchmark_reload import base_rows, synthetic_csv_leaves
+
+# 휴가 데이터 캐시 적중 시간과 워커별 메모리(RSS) 비교
+# filesystem: 기존 Flask-Caching 파일 캐시 (적중할 때마다 세 데이터프레임을 디스크에서 역직렬화)
+# dataset: VacationDataset (프로세스 메모리에 보관, 새 워커는 CSV를 직접 처리)
+# 워커마다 별도 프로세스에서 측정하여 메모리 사용량이 섞이지 않게 함
+
+CALLBACKS_PER_TICK = 4  # 갱신 주기마다 데이터를 읽는 콜백 수
+CACHE_KEY = 'load_and_process_data'
+
+# 현재 RSS (MB), /proc이 없으면 최대 RSS로 대신함
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return peak_rss_mb()
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+# 워커 프로세스: 첫 로드 후 ticks번의 갱신 주기 동안 콜백 수만큼 데이터를 읽음
+def run_worker(mode, csv_path, cache_dir, ticks):
+    with contextlib.redirect_stdout(io.StringIO()):
+        import vacation_dash
+    logging.disable(logging.CRITICAL)
+    base_rss = rss_mb()
+
+    if mode == 'filesystem':
+        from flask_caching.backends.filesystemcache import FileSystemCache
+        cache = FileSystemCache(cache_dir, default_timeout=0)
+
+        def load():
+            frames = cache.get(CACHE_KEY)
+            if frames is None:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    frames = vacation_dash.load_and_process_data(csv_path)
+                cache.set(CACHE_KEY, frames)
+            return frames
+    else:
+        from dataset import VacationDataset
+        dataset = VacationDataset(csv_path, vacation_dash.load_and_process_data)
+
+        def load():
+            with contextlib.redirect_stdout(io.StringIO()):
+                return dataset.get()
+
+    start = time.perf_counter()
+    frames = load()
+    first_load = time.perf_counter() - start
+    del frames
+
+    hits = []
+    for _ in range(ticks):
+        for _ in range(CALLBACKS_PER_TICK):
+            start = time.perf_counter()
+            frames = load()
+            hits.append(time.perf_counter() - start)
+            del frames
+    hits.sort()
+    print(json.dumps({
+        'first_load_ms': first_load * 1000,
+        'hit_median_ms': hits[len(hits) // 2] * 1000,
+        'hit_max_ms': hits[-1] * 1000,
+        'base_rss_mb': base_rss,
+        'rss_mb': rss_mb(),
+        'peak_rss_mb': peak_rss_mb(),
+    }))
+
+def spawn_worker(mode, csv_path, cache_dir, ticks):
+    command = [sys.executable, os.path.abspath(__file__), '--worker', mode,
+               '--csv', csv_path, '--cache-dir', cache_dir, '--ticks', str(ticks)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def benchmark(scales, ticks):
+    rows = base_rows()
+    print(f"기준 행 수: {rows}, 갱신 {ticks}회 × 콜백 {CALLBACKS_PER_TICK}개")
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, 'vacation.csv')
+            synthetic_csv_leaves(rows * scale).to_csv(csv_path, index=False, encoding='utf-8-sig')
+            cache_dir = os.path.join(directory, 'cache-directory')
+            print(f"\n{scale}x ({rows * scale} 행)")
+            print(f"  {'방식':<22} {'첫 로드':>10} {'적중(중앙값)':>12} {'적중(최대)':>10} {'RSS 증가':>9} {'최대 RSS':>9}")
+            # filesystem은 첫 번째 워커가 만든 캐시를 두 번째 워커가 사용 (dataset은 워커마다 CSV를 직접 처리)
+            for mode in ['filesystem', 'dataset']:
+                for worker in ['첫 워커', '다음 워커']:
+                    result = spawn_worker(mode, csv_path, cache_dir, ticks)
+                    print(f"  {mode + ' ' + worker:<22} {result['first_load_ms']:8.1f}ms {result['hit_median_ms']:10.3f}ms "
+                          f"{result['hit_max_ms']:8.3f}ms {result['rss_mb'] - result['base_rss_mb']:7.1f}MB {result['peak_rss_mb']:7.1f}MB")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="휴가 데이터 캐시 적중 시간/워커 메모리 비교 (filesystem 캐시 vs VacationDataset)")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100], help="CSV 크기 배수")
+    parser.add_argument('--ticks', type=int, default=10, help="측정할 갱신 주기 수")
+    parser.add_argument('--worker', choices=['filesystem', 'dataset'], help=argparse.SUPPRESS)
+    parser.add_argument('--csv', help=argparse.SUPPRESS)
+    parser.add_argument('--cache-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        run_worker(args.worker, args.csv, args.cache_dir, args.ticks)
+    else:
+        benchmark(args.scales, args.ticks)
@@ -0,0 +1,214 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from date_utils import parse_dates
+from leave_processing import distribute_leave_points, expand_leave_dates, update_last_document_points
+
+# 휴가 데이터 재로드 처리 시간 비교 (기존 행 단위 apply 구현 vs 현재 구현)
+# 실제 CSV 크기의 배수로 합성 데이터를 만들어 단계별 처리 시간을 측정하고, 두 구현의 결과가 같은지 확인
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '2024_vacation.csv')
+DEFAULT_BASE_ROWS = 374  # CSV가 없을 때 사용할 기준 행 수 (크롤러 마지막 수집 건수)
+LEGACY_MAX_ROWS = 40000  # 기존 구현은 이 행 수까지만 측정 (그 이상은 수 분 이상 소요)
+
+DEPARTMENTS = ['개발팀', '퍼블리싱', '디자인팀', '기획팀', '영업팀', '경영지원팀']
+LEAVE_TYPES = ['연차', '연차', '연차', '반차', '반반차', '병가', '경조사']
+LEAVE_POINTS = [1.0, 0.5, 0.25, 2.0, 3.0]
+
+
+# ---- 기존 구현 (행 단위 apply) ----
+
+DATE_COLUMNS = [('기안일', '기안 요일'), ('시작 날짜', '시작 요일'), ('종료 날짜', '종료 요일')]
+
+def legacy_clean_date(date):
+    if pd.isna(date):
+        return pd.NaT, None
+    parts = date.split('(')
+    date_cleaned = parts[0].strip()
+    day_of_week = parts[1][:-1] if len(parts) > 1 else None
+    try:
+        date_converted = pd.to_datetime(date_cleaned, errors='coerce')
+    except:
+        date_converted = pd.NaT
+    return date_converted, day_of_week
+
+def legacy_parse_dates(df):
+    df = df.copy()
+    for date_column, weekday_column in DATE_COLUMNS:
+        df[[date_column, weekday_column]] = df[date_column].apply(lambda x: legacy_clean_date(x)).apply(pd.Series)
+        # 요일이 없는 행은 apply(pd.Series)에서 정수(ns)로 바뀌므로, 대시보드와 같이 다시 날짜로 변환
+        df[date_column] = pd.to_datetime(df[date_column])
+    return df
+
+def legacy_distribute_points_by_day(row):
+    total_points = float(row['신청 포인트'])
+    start_date = row['시작 날짜']
+    end_date = row['종료 날짜']
+    vacation_type = row.get('휴가 종류', '기타')
+
+    if pd.isna(start_date) or pd.isna(end_date):
+        return pd.DataFrame()
+
+    date_range = pd.date_range(start=start_date, end=end_date, freq='D')
+    weekdays = date_range[date_range.weekday < 5]
+    if len(weekdays) == 0:
+        return pd.DataFrame()
+
+    if vacation_type == '연차':
+        if total_points == 0.25:
+            vacation_type = '반반차'
+        elif total_points == 0.5:
+            vacation_type = '반차'
+
+    return pd.DataFrame([{
+        '문서 번호': row.get('문서 번호', 'N/A'),
+        '기안자 이름': row.get('기안자 이름', 'N/A'),
+        '기안 부서': row.get('기안 부서', 'N/A'),
+        '시작 날짜': start_date,
+        '종료 날짜': end_date,
+        '포인트': total_points,
+        '휴가 종류': vacation_type,
+        '휴가 사유': row.get('휴가 사유', 'N/A'),
+        '잔여 포인트': float(row.get('잔여 포인트', 0.0)),
+        '승인 여부': row.get('승인 여부', '완료')
+    }])
+
+def legacy_expand_leave_dates(row):
+    date_range = pd.date_range(start=row['시작 날짜'], end=row['종료 날짜'], freq='D')
+    weekdays = date_range[date_range.weekday < 5]
+    daily_point = float(row['포인트']) / len(weekdays) if len(weekdays) > 0 else 0
+    return pd.DataFrame([{
+        '기안자 이름': row['기안자 이름'],
+        '기안 부서': row['기안 부서'],
+        '날짜': date,
+        '포인트': daily_point,
+        '휴가 종류': row['휴가 종류']
+    } for date in weekdays])
+
+def legacy_update_last_document_points(distributed_df):
+    grouped = distributed_df.groupby(['기안자 이름', '문서 번호'])
+    for (name, doc_num), group in grouped:
+        final_remaining = group['잔여 포인트'].iloc[-1]
+        final_submit = group['포인트'].iloc[-1]
+        idx = (distributed_df['기안자 이름'] == name) & (distributed_df['문서 번호'] == doc_num)
+        distributed_df.loc[idx, '잔여 포인트'] = final_remaining - final_submit
+    return distributed_df
+
+def current_parse_dates(df):
+    df = df.copy()
+    for date_column, weekday_column in DATE_COLUMNS:
+        df[date_column], df[weekday_column] = parse_dates(df[date_column])
+    return df
+
+def legacy_distribute(df):
+    return pd.concat(df.apply(legacy_distribute_points_by_day, axis=1).tolist(), ignore_index=True)
+
+def legacy_expand(distributed_df):
+    return pd.concat(distributed_df.apply(legacy_expand_leave_dates, axis=1).tolist(), ignore_index=True)
+
+
+# ---- 합성 데이터 ----
+
+# 결재 완료/반려가 섞인 휴가 문서 데이터 (날짜 컬럼은 파싱 후 형태)
+def synthetic_leaves(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    n_employees = max(20, n_rows // 6)
+    years = max(1, int(np.log10(max(n_rows, 1))) - 1)  # 행 수가 많을수록 여러 해에 걸친 기록
+    start = np.datetime64('2024-01-01') + rng.integers(0, 365 * years, n_rows).astype('timedelta64[D]')
+    points = rng.choice(LEAVE_POINTS, n_rows)
+    end = start + np.maximum(np.ceil(points).astype(int) - 1, 0).astype('timedelta64[D]')
+    start[rng.random(n_rows) < 0.01] = np.datetime64('NaT')  # 날짜 파싱에 실패한 문서
+    employees = rng.integers(0, n_employees, n_rows)
+    documents = np.arange(n_rows)
+    documents[1:][rng.random(n_rows - 1) < 0.02] -= 1  # 같은 기안자가 같은 문서 번호로 다시 올린 문서
+    employees[1:][documents[1:] == documents[:-1]] = employees[:-1][documents[1:] == documents[:-1]]
+    remaining = rng.integers(0, 30, n_rows).astype(float)
+    remaining[rng.random(n_rows) < 0.01] = np.nan  # 잔여 포인트가 비어 있는 문서
+    return pd.DataFrame({
+        '문서 번호': [f'휴가-{i:07d}' for i in documents],
+        '기안자 이름': [f'직원{e:05d}' for e in employees],
+        '기안 부서': np.array(DEPARTMENTS)[employees % len(DEPARTMENTS)],
+        '휴가 종류': rng.choice(LEAVE_TYPES, n_rows),
+        '시작 날짜': pd.to_datetime(start),
+        '종료 날짜': pd.to_datetime(end),
+        '잔여 포인트': remaining,
+        '신청 포인트': points,
+        '휴가 사유': '개인 사유',
+        '승인 여부': np.where(rng.random(n_rows) < 0.95, '완료', '반려'),
+    })
+
+# CSV에 저장된 형태의 날짜 문자열 (예: '2024-01-01(월)', 일부는 요일 없이 저장)
+def date_text(dates, seed=0):
+    rng = np.random.default_rng(seed)
+    weekdays = np.array(list('월화수목금토일'))[dates.dt.weekday.fillna(0).astype(int)]
+    text = dates.dt.strftime('%Y-%m-%d') + '(' + weekdays + ')'
+    plain = rng.random(len(dates)) < 0.1
+    text[plain] = dates[plain].dt.strftime('%Y-%m-%d')
+    return text.where(dates.notna())
+
+def synthetic_csv_leaves(n_rows, seed=0):
+    df = synthetic_leaves(n_rows, seed)
+    df.insert(3, '기안일', df['시작 날짜'] - pd.Timedelta(days=3))
+    for column in ['기안일', '시작 날짜', '종료 날짜']:
+        df[column] = date_text(df[column], seed)
+    return df
+
+def base_rows():
+    if os.path.exists(CSV_PATH):
+        return len(pd.read_csv(CSV_PATH, encoding='utf-8-sig'))
+    return DEFAULT_BASE_ROWS
+
+
+# ---- 측정 ----
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+# 단계별 (이름, 기존 구현, 현재 구현, 입력 데이터)
+# 잔여 포인트 갱신은 입력을 직접 수정하므로 복사본으로 실행
+def stages(raw_df):
+    df = current_parse_dates(raw_df)
+    approved = df[df['승인 여부'] == '완료']
+    distributed_df = distribute_leave_points(approved)
+    return [
+        ('날짜 파싱', legacy_parse_dates, current_parse_dates, raw_df),
+        ('포인트 분배', legacy_distribute, distribute_leave_points, approved),
+        ('잔여 포인트', lambda data: legacy_update_last_document_points(data.copy()),
+         lambda data: update_last_document_points(data.copy()), distributed_df),
+        ('기간 확장', legacy_expand, expand_leave_dates, distributed_df),
+    ]
+
+def benchmark(scales, legacy_max_rows=LEGACY_MAX_ROWS):
+    rows = base_rows()
+    print(f"기준 행 수: {rows}")
+    for scale in scales:
+        df = synthetic_csv_leaves(rows * scale)
+        run_legacy = len(df) <= legacy_max_rows
+        total_legacy, total_current = 0.0, 0.0
+        print(f"\n{scale}x ({len(df)} 행)")
+        for name, legacy, current, data in stages(df):
+            result, current_time = timed(current, data)
+            total_current += current_time
+            if run_legacy:
+                expected, legacy_time = timed(legacy, data)
+                total_legacy += legacy_time
+                pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+                print(f"  {name:<8} 기존 {legacy_time * 1000:10.1f} ms  현재 {current_time * 1000:8.1f} ms  ({legacy_time / current_time:6.1f}배)")
+            else:
+                print(f"  {name:<8} 기존 {'-':>10}     현재 {current_time * 1000:8.1f} ms")
+        if run_legacy:
+            print(f"  {'합계':<8} 기존 {total_legacy * 1000:10.1f} ms  현재 {total_current * 1000:8.1f} ms  ({total_legacy / total_current:6.1f}배)")
+        else:
+            print(f"  {'합계':<8} 기존 {'-':>10}     현재 {total_current * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="휴가 데이터 재로드 처리 시간 비교 (기존 apply 구현 vs 현재 구현)")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100, 1000], help="CSV 크기 배수")
+    parser.add_argument('--legacy-max-rows', type=int, default=LEGACY_MAX_ROWS, help="기존 구현을 측정할 최대 행 수")
+    args = parser.parse_args()
+    benchmark(args.scales, args.legacy_max_rows)
@@ -0,0 +1,90 @@
+import os
+import threading
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+# 휴가 데이터 보관소
+# 처음 조회할 때 process(csv_path)로 처리하고, 이후에는 메모리에 있는 데이터프레임을 그대로 반환 (직렬화/복사 없음)
+# 다시 처리하는 것은 감시 스레드(CsvChangeHandler)뿐이며, 요청 스레드는 로드된 데이터와 버전만 읽음
+# 버전은 로드한 파일 키(수정 시간-크기)로 정함: 워커 프로세스가 여러 개여도 같은 파일이면 같은 버전
+# (휴가 CSV는 작아서 워커마다 직접 처리해도 충분히 빠름, 클라이언트는 버전이 바뀔 때만 다시 계산)
+class VacationDataset:
+    def __init__(self, csv_path, process):
+        self.csv_path = csv_path
+        self.process = process
+        self._lock = threading.Lock()
+        self._state = None  # (파일 키, (df, distributed_df, expanded_df))
+        self._observer = None
+
+    def _load(self):
+        # 잠금을 잡은 상태에서 호출: 파일 키가 바뀌었으면 다시 처리 (파일이 없으면 FileNotFoundError)
+        stat = os.stat(self.csv_path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        if self._state is None or self._state[0] != key:
+            self._state = (key, tuple(self.process(self.csv_path)))
+        return self._state[1]
+
+    def get(self):
+        state = self._state
+        if state is not None:
+            return state[1]
+        with self._lock:
+            if self._state is not None:
+                return self._state[1]
+            return self._load()
+
+    @property
+    def version(self):
+        state = self._state
+        if state is None:
+            return None
+        mtime_ns, size = state[0]
+        return f'{mtime_ns}-{size}'
+
+    def reload(self):
+        # 감시 스레드에서 호출: 파일이 바뀌었으면 다시 로드 (실패하면 기존 데이터와 버전 유지)
+        try:
+            with self._lock:
+                self._load()
+        except Exception as e:
+            print(f"Error reloading vacation data: {e}")
+
+    def watch(self):
+        # CSV 변경을 감시하여 다시 로드 (데이터를 다시 처리하는 유일한 경로, 버전 변경)
+        directory = os.path.dirname(os.path.abspath(self.csv_path))
+        if self._observer is not None or not os.path.isdir(directory):
+            return
+        self._observer = Observer()
+        self._observer.daemon = True
+        # CSV를 새 파일로 바꿔치기해 저장해도 놓치지 않도록 파일이 아닌 디렉토리 단위로 감시
+        self._observer.schedule(CsvChangeHandler(self.csv_path, self.reload), path=directory, recursive=False)
+        self._observer.start()
+        print(f"Started watching {self.csv_path}")
+
+# 마지막 변경 이벤트 후 재로드까지 대기 시간 (초)
+# 크롤러가 CSV를 나누어 쓰는 동안 이벤트가 여러 번 와도 한 번만 다시 로드
+RELOAD_DEBOUNCE_SECONDS = 1.0
+
+# CSV 변경 감시 핸들러: 같은 디렉토리의 다른 파일 이벤트는 무시
+# 저장(modified), 새로 생성(created), 임시 파일에서 이름 변경(moved) 모두 대상 CSV 기준으로 판단
+class CsvChangeHandler(FileSystemEventHandler):
+    def __init__(self, csv_path, reload, debounce_seconds=RELOAD_DEBOUNCE_SECONDS):
+        super().__init__()
+        self.csv_path = os.path.abspath(csv_path)
+        self.reload = reload
+        self.debounce_seconds = debounce_seconds
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def on_any_event(self, event):
+        if event.event_type not in ('modified', 'created', 'moved'):
+            return
+        path = event.dest_path if event.event_type == 'moved' else event.src_path
+        if os.path.abspath(path) != self.csv_path:
+            return
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce_seconds, self.reload)
+            self._timer.daemon = True
+            self._timer.start()
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+# 결재 문서 날짜 형식 (예: '2024-01-01(월)', 크롤러가 요일을 제거한 경우 '2024-01-01')
+DATE_FORMAT = '%Y-%m-%d'
+# 첫 번째 '(' 앞은 날짜, 뒤는 요일 + ')'
+DATE_PATTERN = r'^(?P<date>[^(]*)(?:\((?P<weekday>[^(]*))?'
+
+# 날짜 문자열 컬럼을 (고유값 코드, 고유값별 날짜 부분, 고유값별 요일 부분)으로 분리
+# 같은 날짜 문자열이 반복되므로 고유값만 정규식으로 분리 (결측값의 코드는 -1)
+def split_unique_dates(dates):
+    codes, uniques = pd.factorize(dates)
+    parts = pd.Series(uniques, dtype='string').str.extract(DATE_PATTERN)
+    return codes, parts['date'].str.strip(), parts['weekday'].str[:-1]
+
+# 고유값별 결과를 원래 행 순서로 펼침 (결측값 행은 missing)
+def take_by_code(values, codes, missing):
+    return np.append(np.asarray(values), missing)[codes]
+
+# 요일을 제거한 날짜 문자열 (크롤러 CSV 저장용, 결측값은 빈 문자열)
+def strip_weekday(dates):
+    codes, date_text, _ = split_unique_dates(dates)
+    return pd.Series(take_by_code(date_text.fillna('').astype(object), codes, ''), index=dates.index, name=dates.name)
+
+# 날짜 문자열 컬럼을 (날짜, 요일) 두 컬럼으로 변환 (행 단위 apply 대신 컬럼 전체를 한 번에 파싱)
+# 정해진 형식으로 파싱되지 않는 값만 형식 추론으로 다시 파싱하고, 그래도 실패하면 NaT
+def parse_dates(dates):
+    codes, date_text, weekday = split_unique_dates(dates)
+    parsed = pd.to_datetime(date_text, format=DATE_FORMAT, errors='coerce')
+    retry = parsed.isna() & date_text.notna() & (date_text != '')
+    if retry.any():
+        parsed[retry] = pd.to_datetime(date_text[retry], format='mixed', errors='coerce')
+
+    parsed = pd.Series(take_by_code(parsed.to_numpy(dtype='datetime64[ns]'), codes, np.datetime64('NaT', 'ns')),
+                       index=dates.index, name=dates.name)
+    weekday = pd.Series(take_by_code(weekday.astype(object).where(weekday.notna(), None), codes, None),
+                        index=dates.index)
+    return parsed, weekday
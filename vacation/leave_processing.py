@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+# 문서별 포인트 분배 결과 컬럼 (순서 유지)
+DISTRIBUTED_COLUMNS = [
+    '문서 번호', '기안자 이름', '기안 부서', '시작 날짜', '종료 날짜',
+    '포인트', '휴가 종류', '휴가 사유', '잔여 포인트', '승인 여부'
+]
+
+# 컬럼이 없을 때 사용할 기본값
+DISTRIBUTED_DEFAULTS = {
+    '휴가 종류': '기타',
+    '휴가 사유': 'N/A',
+    '잔여 포인트': 0.0,
+    '승인 여부': '완료',
+    '문서 번호': 'N/A',
+    '기안 부서': 'N/A',
+    '기안자 이름': 'N/A',
+}
+
+# 포인트에 따라 연차를 반차/반반차로 재분류
+HALF_DAY_TYPES = {0.25: '반반차', 0.5: '반차'}
+
+# 날짜 Series를 일 단위 datetime64 배열로 변환
+def to_days(dates):
+    return pd.to_datetime(dates).to_numpy(dtype='datetime64[D]')
+
+# 시작 날짜부터 종료 날짜까지 (양 끝 포함) 평일(월~금) 수, 날짜가 없거나 순서가 뒤바뀐 경우 0
+def business_day_counts(start_dates, end_dates):
+    start = to_days(start_dates)
+    end = to_days(end_dates)
+    valid = ~(np.isnat(start) | np.isnat(end))
+    counts = np.zeros(len(start), dtype=np.int64)
+    counts[valid] = np.maximum(np.busday_count(start[valid], end[valid] + np.timedelta64(1, 'D')), 0)
+    return counts
+
+# 문서별 포인트 정리 (행 단위 apply 대신 컬럼 단위로 한 번에 처리)
+# 시작/종료 날짜가 없거나 기간에 평일이 없는 문서는 제외
+def distribute_leave_points(df):
+    weekdays = business_day_counts(df['시작 날짜'], df['종료 날짜'])
+    rows = df[weekdays > 0]
+
+    distributed_df = pd.DataFrame(index=rows.index)
+    for column in DISTRIBUTED_COLUMNS:
+        if column == '포인트':
+            distributed_df[column] = rows['신청 포인트'].astype(float)
+        elif column in rows:
+            distributed_df[column] = rows[column].astype(float) if column == '잔여 포인트' else rows[column]
+        else:
+            distributed_df[column] = DISTRIBUTED_DEFAULTS[column]
+
+    # 휴가 종류가 연차더라도, 포인트 값에 따라 반차 또는 반반차로 변경
+    annual = distributed_df['휴가 종류'] == '연차'
+    for points, vacation_type in HALF_DAY_TYPES.items():
+        distributed_df.loc[annual & (distributed_df['포인트'] == points), '휴가 종류'] = vacation_type
+
+    return distributed_df.reset_index(drop=True)
+
+# 휴가 기간을 평일 단위로 확장
+# 문서별 평일 수만큼 행을 반복하고, 문서 안에서의 순번만큼 평일을 이동하여 날짜를 계산
+def expand_leave_dates(distributed_df):
+    weekdays = business_day_counts(distributed_df['시작 날짜'], distributed_df['종료 날짜'])
+    rows = np.repeat(np.arange(len(distributed_df)), weekdays)
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(weekdays) - weekdays, weekdays)
+    start = to_days(distributed_df['시작 날짜'])[rows]
+
+    expanded_df = pd.DataFrame({
+        '기안자 이름': distributed_df['기안자 이름'].to_numpy()[rows],
+        '기안 부서': distributed_df['기안 부서'].to_numpy()[rows],
+        '날짜': np.busday_offset(start, offsets, roll='forward').astype('datetime64[ns]'),
+        # 일별 포인트 계산 (총 포인트를 평일 수로 나눔)
+        '포인트': distributed_df['포인트'].to_numpy(dtype=float)[rows] / weekdays[rows],
+        '휴가 종류': distributed_df['휴가 종류'].to_numpy()[rows],
+    })
+    return expanded_df
+
+# 기안자별 문서의 잔여 포인트를 (마지막 행의 잔여 포인트 - 마지막 행의 신청 포인트)로 갱신
+# 그룹별 반복 대신, 행 위치를 그룹별 마지막 값으로 변환(transform)하여 한 번에 계산
+# (포인트 값을 직접 변환하면 'last'가 결측값을 건너뛰므로 행 위치를 사용)
+# 기안자 이름이나 문서 번호가 없는 행은 그대로 유지
+def update_last_document_points(distributed_df):
+    keys = ['기안자 이름', '문서 번호']
+    positions = pd.Series(np.arange(len(distributed_df)), index=distributed_df.index)
+    last = positions.groupby([distributed_df[key] for key in keys]).transform('last')
+
+    grouped = last.notna().to_numpy()
+    last = last[grouped].to_numpy(dtype=np.int64)
+    remaining = distributed_df['잔여 포인트'].to_numpy(dtype=float, copy=True)
+    submitted = distributed_df['포인트'].to_numpy(dtype=float)
+    remaining[grouped] = remaining[last] - submitted[last]
+    distributed_df['잔여 포인트'] = remaining
+    return distributed_df
@@ -0,0 +1,68 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from leave_processing import distribute_leave_points, update_last_document_points
+
+# 크롤러가 저장하는 CSV와 같은 컬럼/형식의 결재 문서
+# - 김철수: 문서가 하나뿐인 기안자
+# - 이영희: 같은 문서 번호로 두 번 올린 문서 (마지막 행 기준으로 두 행 모두 갱신) + 다른 문서 하나
+# - 박민수: 주말만 신청한 문서, 반려 문서, 잔여 포인트가 비어 있는 문서
+# - 최지우: 문서 번호가 비어 있는 문서 (갱신하지 않음)
+# - 정수진: 같은 문서 번호의 마지막 행 잔여 포인트가 비어 있는 문서
+VACATION_CSV = """문서 번호,기안자 이름,기안 부서,기안일,휴가 종류,시작 날짜,종료 날짜,잔여 포인트,신청 포인트,휴가 사유,승인 여부
+휴가-0001,김철수,기술개발팀,2024-03-01(금),연차,2024-03-04(월),2024-03-05(화),10,2,개인 사유,완료
+휴가-0002,이영희,기획팀,2024-03-01(금),연차,2024-03-06(수),2024-03-06(수),5,0.5,개인 사유,완료
+휴가-0002,이영희,기획팀,2024-03-02(토),연차,2024-03-07(목),2024-03-07(목),4.5,1,개인 사유,완료
+휴가-0003,이영희,기획팀,2024-03-05(화),연차,2024-03-11(월),2024-03-12(화),3.5,2,개인 사유,완료
+휴가-0004,박민수,UI-UX팀,2024-03-05(화),연차,2024-03-09(토),2024-03-10(일),9,1,개인 사유,완료
+휴가-0005,박민수,UI-UX팀,2024-03-06(수),연차,2024-03-12(화),2024-03-12(화),9,1,개인 사유,반려
+휴가-0006,박민수,UI-UX팀,2024-03-07(목),병가,2024-03-13(수),2024-03-13(수),,1,병원 진료,완료
+,최지우,영업팀,2024-03-08(금),연차,2024-03-14(목),2024-03-14(목),7,1,개인 사유,완료
+휴가-0007,정수진,경영지원팀,2024-03-08(금),연차,2024-03-15(금),2024-03-15(금),6,0.25,개인 사유,완료
+휴가-0007,정수진,경영지원팀,2024-03-11(월),연차,2024-03-18(월),2024-03-18(월),,1,개인 사유,완료
+"""
+
+# 기존 구현 (기안자/문서별 반복으로 마스크를 만들어 갱신) - 결과 비교 기준
+def legacy_update_last_document_points(distributed_df):
+    grouped = distributed_df.groupby(['기안자 이름', '문서 번호'])
+    for (name, doc_num), group in grouped:
+        final_remaining = group['잔여 포인트'].iloc[-1]
+        final_submit = group['포인트'].iloc[-1]
+        idx = (distributed_df['기안자 이름'] == name) & (distributed_df['문서 번호'] == doc_num)
+        distributed_df.loc[idx, '잔여 포인트'] = final_remaining - final_submit
+    return distributed_df
+
+# 대시보드와 같은 순서로 날짜 변환 (요일 제거), 승인 완료 문서 필터링, 포인트 분배
+@pytest.fixture
+def distributed_df():
+    df = pd.read_csv(io.StringIO(VACATION_CSV), sep=',')
+    for column in ['시작 날짜', '종료 날짜']:
+        df[column] = pd.to_datetime(df[column].str.split('(').str[0].str.strip())
+    df = df[df['승인 여부'] == '완료']
+    return distribute_leave_points(df)
+
+def test_update_last_document_points(distributed_df):
+    result = update_last_document_points(distributed_df.copy())
+    assert result['문서 번호'].fillna('').tolist() == [
+        '휴가-0001', '휴가-0002', '휴가-0002', '휴가-0003', '휴가-0006', '', '휴가-0007', '휴가-0007'
+    ]
+    np.testing.assert_array_equal(
+        result['잔여 포인트'].to_numpy(),
+        [8.0, 3.5, 3.5, 1.5, np.nan, 7.0, np.nan, np.nan]
+    )
+    # 잔여 포인트 외의 컬럼은 그대로 유지
+    pd.testing.assert_frame_equal(result.drop(columns='잔여 포인트'), distributed_df.drop(columns='잔여 포인트'))
+
+def test_update_last_document_points_matches_legacy(distributed_df):
+    expected = legacy_update_last_document_points(distributed_df.copy())
+    result = update_last_document_points(distributed_df.copy())
+    pd.testing.assert_frame_equal(result, expected)
+
+def test_update_last_document_points_single_rows(distributed_df):
+    # 기안자별 문서가 하나씩이면 각 행의 (잔여 포인트 - 포인트)
+    single = distributed_df.drop_duplicates(subset=['기안자 이름', '문서 번호'], keep='last').reset_index(drop=True)
+    expected = single['잔여 포인트'] - single['포인트']
+    expected[single['문서 번호'].isna()] = single['잔여 포인트']
+    result = update_last_document_points(single.copy())
+    pd.testing.assert_series_equal(result['잔여 포인트'], expected, check_names=False)
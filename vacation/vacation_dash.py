@@ -1,5 +1,6 @@
 import os
 import dash
+import flask
 import numpy as np
 import logging
 import dash_bootstrap_components as dbc
@@ -7,147 +8,36 @@ from dash import dcc, html, Input, Output, State
 from dash.dash_table import DataTable
 import pandas as pd
 import plotly.express as px
-from flask_caching import Cache
+from dataset import VacationDataset
+from date_utils import parse_dates
+from leave_processing import distribute_leave_points, expand_leave_dates, update_last_document_points
 
 # 로깅 기본 구성
 logging.basicConfig(level=logging.DEBUG)
 
+# 보관소의 데이터프레임을 여러 콜백이 함께 쓰므로, 콜백에서 수정해도 원본이 바뀌지 않도록 Copy-on-Write 모드 사용
+pd.set_option('mode.copy_on_write', True)
+
 # Dash 앱 초기화 및 Bootstrap 테마 적용
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.MINTY])
 server = app.server  # 플랫폼에 배포 시 사용
 
-# 캐시 디렉토리 생성
-if not os.path.exists('cache-directory'):
-    os.makedirs('cache-directory')
-
-# Flask-Caching 설정
-cache = Cache(app.server, config={
-    'CACHE_TYPE': 'filesystem',        # 파일 시스템을 캐시로 사용
-    'CACHE_DIR': 'cache-directory',    # 캐시 파일을 저장할 디렉토리
-    'CACHE_DEFAULT_TIMEOUT': 300       # 캐시 만료 시간 (초 단위, 기본 5분)
-})
-
 # CSV 파일 경로 설정
 CSV_PATH = os.path.abspath('vacation/2024_vacation.csv')
 
+# (날짜 컬럼, 분리한 요일 컬럼)
+DATE_COLUMNS = [('기안일', '기안 요일'), ('시작 날짜', '시작 요일'), ('종료 날짜', '종료 요일')]
+
 # 그래프에 사용할 파스텔 색상 설정
 pastel_colors = px.colors.qualitative.Pastel1
 
-# 날짜를 정리하고 처리하는 헬퍼 함수
-def clean_date(date):
-    if pd.isna(date):
-        return pd.NaT, None
-    parts = date.split('(')
-    date_cleaned = parts[0].strip()
-    day_of_week = parts[1][:-1] if len(parts) > 1 else None
-    try:
-        date_converted = pd.to_datetime(date_cleaned, errors='coerce')
-    except:
-        date_converted = pd.NaT
-    return date_converted, day_of_week
-
-# 포인트를 일별로 분배하는 헬퍼 함수 수정
-def distribute_points_by_day(row):
-    total_points = float(row['신청 포인트'])
-    start_date = row['시작 날짜']
-    end_date = row['종료 날짜']
-    vacation_type = row.get('휴가 종류', '기타')
-    leave_reason = row.get('휴가 사유', 'N/A')
-    remaining_after = float(row.get('잔여 포인트', 0.0))
-    approval_status = row.get('승인 여부', '완료')
-    document_number = row.get('문서 번호', 'N/A')
-    department = row.get('기안 부서', 'N/A')
-    applicant_name = row.get('기안자 이름', 'N/A')
-
-    if pd.isna(start_date) or pd.isna(end_date):
-        return pd.DataFrame()
-
-    # '시작 날짜'부터 '종료 날짜'까지의 날짜 리스트 생성 (주말 제외)
-    date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-    # 주말(토요일: 5, 일요일: 6)을 제외
-    weekdays = date_range[date_range.weekday < 5]
-
-    if len(weekdays) == 0:
-        return pd.DataFrame()
-
-    # 휴가 종류가 연차더라도, 포인트 값에 따라 반차 또는 반반차로 변경
-    if vacation_type == '연차':
-        if total_points == 0.25:
-            vacation_type = '반반차'
-        elif total_points == 0.5:
-            vacation_type = '반차'
-        else:
-            vacation_type = '연차'
-
-    distributed_point = {
-        '문서 번호': document_number,
-        '기안자 이름': applicant_name,
-        '기안 부서': department,
-        '시작 날짜': start_date,
-        '종료 날짜': end_date,
-        '포인트': total_points,        # 총 신청 포인트
-        '휴가 종류': vacation_type,
-        '휴가 사유': leave_reason,
-        '잔여 포인트': remaining_after,
-        '승인 여부': approval_status
-    }
-
-    return pd.DataFrame([distributed_point])
-
-#휴가 기간을 분배하는 함수
-def expand_leave_dates(row):
-    total_points = float(row['포인트'])
-    start_date = row['시작 날짜']
-    end_date = row['종료 날짜']
-    vacation_type = row['휴가 종류']
-    applicant_name = row['기안자 이름']
-    department = row['기안 부서']
-
-    # '시작 날짜'부터 '종료 날짜'까지의 날짜 리스트 생성 (주말 제외)
-    date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-    # 주말(토요일: 5, 일요일: 6)을 제외
-    weekdays = date_range[date_range.weekday < 5]
-
-    # 일별 포인트 계산 (총 포인트를 평일 수로 나눔)
-    daily_point = total_points / len(weekdays) if len(weekdays) > 0 else 0
-
-    expanded_rows = []
-    for date in weekdays:
-        expanded_row = {
-            '기안자 이름': applicant_name,
-            '기안 부서': department,
-            '날짜': date,
-            '포인트': daily_point,
-            '휴가 종류': vacation_type
-        }
-        expanded_rows.append(expanded_row)
-
-    return pd.DataFrame(expanded_rows)
-
-def update_last_document_points(distributed_df):
-    # 기안자 이름별로 그룹화하여 마지막 문서번호에 잔여 포인트 업데이트
-    grouped = distributed_df.groupby(['기안자 이름', '문서 번호'])
-
-    # 각 기안자의 마지막 문서 번호를 가져와 잔여 포인트를 계산 및 업데이트
-    for (name, doc_num), group in grouped:
-        # 각 기안자별로 문서 번호 기준으로 마지막 문서 찾기
-        final_remaining = group['잔여 포인트'].iloc[-1]
-        final_submit = group['포인트'].iloc[-1]
-
-        # 마지막 문서에 해당하는 잔여 포인트 업데이트
-        idx = (distributed_df['기안자 이름'] == name) & (distributed_df['문서 번호'] == doc_num)
-        distributed_df.loc[idx, '잔여 포인트'] = final_remaining - final_submit
-
-    return distributed_df
-
-# 데이터 로드 및 처리 함수 (캐시 활성화)
-@cache.memoize()
-def load_and_process_data(file_mod_time):
+# 데이터 로드 및 처리 함수
+def load_and_process_data(csv_path=CSV_PATH):
     logging.debug("Loading and processing data...")
-    if not os.path.exists(CSV_PATH):
-        raise FileNotFoundError(f"CSV 파일을 찾을 수 없습니다: {CSV_PATH}")
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"CSV 파일을 찾을 수 없습니다: {csv_path}")
 
-    df = pd.read_csv(CSV_PATH, sep=',', encoding='utf-8-sig')
+    df = pd.read_csv(csv_path, sep=',', encoding='utf-8-sig')
 
     # 컬럼 이름의 앞뒤 공백 제거
     df.columns = df.columns.str.strip()
@@ -159,9 +49,8 @@ def load_and_process_data(file_mod_time):
     })
 
     # 날짜 컬럼 분리 및 변환
-    df[['기안일', '기안 요일']] = df['기안일'].apply(lambda x: clean_date(x)).apply(pd.Series)
-    df[['시작 날짜', '시작 요일']] = df['시작 날짜'].apply(lambda x: clean_date(x)).apply(pd.Series)
-    df[['종료 날짜', '종료 요일']] = df['종료 날짜'].apply(lambda x: clean_date(x)).apply(pd.Series)
+    for date_column, weekday_column in DATE_COLUMNS:
+        df[date_column], df[weekday_column] = parse_dates(df[date_column])
 
 
     # 승인 여부가 '완료'인 연차만 필터링
@@ -172,10 +61,7 @@ def load_and_process_data(file_mod_time):
     df['종료 날짜'] = pd.to_datetime(df['종료 날짜'])
 
     # 포인트를 문서별로 처리
-    distributed_df = pd.concat(
-        df.apply(distribute_points_by_day, axis=1).tolist(),
-        ignore_index=True
-    )
+    distributed_df = distribute_leave_points(df)
 
     logging.debug(f"분배된 데이터프레임(distributed_df) 정보:\n{distributed_df.info()}")
     logging.debug(f"분배된 데이터프레임(distributed_df) 첫 5행:\n{distributed_df.head()}")
@@ -185,18 +71,32 @@ def load_and_process_data(file_mod_time):
     distributed_df = update_last_document_points(distributed_df)
 
     # 휴가 기간을 일별로 확장한 데이터프레임 생성
-    expanded_df = pd.concat(
-        distributed_df.apply(expand_leave_dates, axis=1).tolist(),
-        ignore_index=True
-    )
+    expanded_df = expand_leave_dates(distributed_df)
 
     logging.debug(f"확장된 데이터프레임(expanded_df) 정보:\n{expanded_df.info()}")
     logging.debug(f"확장된 데이터프레임(expanded_df) 첫 5행:\n{expanded_df.head()}")
 
     return df, distributed_df, expanded_df
 
+# 처리된 데이터 보관소 (CSV 수정 시간 기준, 프로세스 메모리)
+# CSV가 바뀌면 감시 스레드가 미리 다시 로드 (데이터 버전은 CSV 수정 시간-크기)
+dataset = VacationDataset(CSV_PATH, load_and_process_data)
+dataset.watch()
+
+# 데이터 버전 확인 주기 (밀리초)
+# 브라우저는 이 주기마다 /data-version만 확인하고, 버전이 바뀐 경우에만 대시보드 콜백이 실행됨
+DATA_VERSION_POLL_INTERVAL = 10 * 1000
+
+# 현재 데이터 버전 (대시보드 콜백 없이 응답하는 가벼운 엔드포인트)
+# 감시 스레드가 마지막으로 로드한 버전만 반환하고, 요청 스레드에서는 파일을 확인하거나 다시 로드하지 않음
+@server.route('/data-version')
+def get_data_version():
+    response = flask.jsonify(version=dataset.version)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 # Dash 앱 레이아웃 설정
-app.layout = dbc.Container([
+layout = dbc.Container([
     # 헤더
     dbc.Row(
         dbc.Col(
@@ -475,23 +375,58 @@ app.layout = dbc.Container([
         ], md=12)
     ]),
 
-    # Interval 컴포넌트: 1분(60초)마다 데이터 업데이트
+    # Interval 컴포넌트: 데이터 버전 확인 주기 (서버 콜백은 실행하지 않음)
     dcc.Interval(
         id='interval-component',
-        interval=60*1000,      # 60,000 밀리초 = 60초 = 1분
+        interval=DATA_VERSION_POLL_INTERVAL,
         n_intervals=0         # 초기 값
     )
 ], fluid=True)
 
+# 페이지를 열 때마다 현재 데이터 버전을 넣어서 레이아웃 생성
+def serve_layout():
+    dataset.get()  # 첫 페이지 요청이면 데이터를 로드하여 버전을 정함
+    version = dataset.version
+    return html.Div([
+        layout,
+        dcc.Store(id='data-version', data=version),       # 대시보드 콜백 입력 (버전이 바뀔 때만 갱신)
+        dcc.Store(id='data-version-seen', data=version),  # 마지막으로 확인한 버전
+    ])
+
+app.layout = serve_layout
+
+# 데이터 버전 확인 (브라우저에서 실행)
+# 버전이 바뀐 경우에만 data-version을 갱신하여 대시보드 콜백을 실행
+app.clientside_callback(
+    """
+    async function(n_intervals, seen) {
+        const noUpdate = window.dash_clientside.no_update;
+        try {
+            const response = await fetch('%s', {cache: 'no-store'});
+            const version = (await response.json()).version;
+            if (version === seen) {
+                return [noUpdate, noUpdate];
+            }
+            return [version, version];
+        } catch (e) {
+            return [noUpdate, noUpdate];
+        }
+    }
+    """ % app.get_relative_path('/data-version'),
+    [Output('data-version', 'data'), Output('data-version-seen', 'data')],
+    Input('interval-component', 'n_intervals'),
+    State('data-version-seen', 'data'),
+    prevent_initial_call=True
+)
+
 # 부서 필터 옵션 업데이트 콜백
 @app.callback(
     Output('department-filter', 'options'),
-    Input('interval-component', 'n_intervals')
+    Input('data-version', 'data')
 )
-def update_department_options(n_intervals):
+def update_department_options(data_version):
     try:
-        file_mod_time = int(os.path.getmtime(CSV_PATH))
-        df, _, _ = load_and_process_data(file_mod_time)  
+        df, _, _ = dataset.get()  
     except FileNotFoundError:
         return [{'label': '전체', 'value': '전체'}]
     except Exception as e:
@@ -515,14 +450,13 @@ def update_department_options(n_intervals):
         Output('date-slider', 'value')
     ],
     [
-        Input('interval-component', 'n_intervals'),
+        Input('data-version', 'data'),
         Input('sort-criteria', 'value')
     ]
 )
-def update_date_slider(n_intervals, sort_criteria):
+def update_date_slider(data_version, sort_criteria):
     try:
-        file_mod_time = int(os.path.getmtime(CSV_PATH))
-        _, distributed_df, _ = load_and_process_data(file_mod_time)  
+        _, distributed_df, _ = dataset.get()  
     except FileNotFoundError:
         return 0, 0, {}, [0, 0]
     except Exception as e:
@@ -575,21 +509,18 @@ def update_date_slider(n_intervals, sort_criteria):
         Output('department-vacation-distribution', 'figure')   # 부서별 잔여 연차 분포 그래프
     ],
     [
-        Input('interval-component', 'n_intervals'),
+        Input('data-version', 'data'),
         Input('department-filter', 'value'),
         Input('leave-type', 'value'),
         Input('sort-criteria', 'value'),
         Input('date-slider', 'value')  # RangeSlider의 value를 Input으로 추가
     ]
 )
-def update_dashboard(n_intervals, department, leave_type, sort_criteria, date_slider_values):
+def update_dashboard(data_version, department, leave_type, sort_criteria, date_slider_values):
     logging.debug("Updating dashboard...")
     try:
-        # CSV 파일의 수정 시간 가져오기
-        file_mod_time = int(os.path.getmtime(CSV_PATH))
-
         # 데이터 로드 및 처리
-        df, distributed_df, expanded_df = load_and_process_data(file_mod_time)
+        df, distributed_df, expanded_df = dataset.get()
     except FileNotFoundError:
         # CSV 파일이 없을 경우, 빈 데이터와 기본 값 반환
         return (
@@ -874,11 +805,8 @@ def display_detail(selected_rows, table_data):
     date = selected_row['시작 날짜']
 
     try:
-        # CSV 파일의 수정 시간 가져오기
-        file_mod_time = int(os.path.getmtime(CSV_PATH))
-
         # 데이터 로드 및 처리
-        df, distributed_df, expanded_df = load_and_process_data(file_mod_time)  # 반환값 세 개 모두 받기
+        df, distributed_df, expanded_df = dataset.get()  # 반환값 세 개 모두 받기
 
     except FileNotFoundError:
         return []
@@ -919,5 +847,4 @@ def display_detail(selected_rows, table_data):
 
 # Dash 앱 실행
 if __name__ == '__main__':
-    cache.clear()
     app.run_server(debug=True)
\ No newline at end of file